@@ -4,30 +4,112 @@ Enhanced Streamlit Application - Production Ready
 import streamlit as st
 import asyncio
 import logging
+import threading
 from datetime import datetime
 import json
 import time
-from typing import Optional
-import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
+from typing import TYPE_CHECKING, Optional, TypedDict
+import numpy as np
 from PIL import Image
 import io
+import html
+import hashlib
+import uuid
+from collections import deque
+from itertools import chain, islice
+from types import MappingProxyType
 
 # Import our production modules
 from src.services import OCRService, AnalysisService
 from src.models.schemas import UserProfile, AnalysisResult
 from src.config import get_settings
-from src.models.database import create_tables, SessionLocal
+from src.models.database import (
+    create_tables, SessionLocal, save_analysis_history, get_analysis_history
+)
 from src.utils.exceptions import OCRError, AnalysisError
 
+# pandas and plotly are only needed by the Dashboard/Analytics views and
+# tables, so they are imported where used to keep cold start fast
+if TYPE_CHECKING:
+    import pandas as pd
+    import plotly.graph_objects as go
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize settings and services
+# Initialize settings (get_settings is already lru-cached per process)
 settings = get_settings()
 
+# st.fragment (Streamlit >= 1.37) or st.experimental_fragment (>= 1.33); a plain call on older versions
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+# Maximum size of the uploaded image preview
+PREVIEW_SIZE = (800, 800)
+
+# Grayscale sample size used for the sharpness/contrast check
+QUALITY_SAMPLE_SIZE = (256, 256)
+
+# Number of recent analyses kept in session state for the sidebar
+SESSION_HISTORY_ENTRIES = 10
+
+# Number of analyses loaded from the database for charts
+MAX_HISTORY_ENTRIES = 200
+
+# Nutrition facts table rows: (NutritionData field, label, unit)
+NUTRIENT_SPEC = (
+    ('calories', 'Calories', 'kcal'),
+    ('total_fat', 'Total Fat', 'g'),
+    ('saturated_fat', 'Saturated Fat', 'g'),
+    ('sodium', 'Sodium', 'mg'),
+    ('total_carbohydrates', 'Total Carbohydrates', 'g'),
+    ('dietary_fiber', 'Dietary Fiber', 'g'),
+    ('total_sugars', 'Total Sugars', 'g'),
+    ('protein', 'Protein', 'g'),
+)
+
+# History fields plotted on the Analytics trend chart, in trace order
+TREND_METRICS = ('health_score', 'novi_score')
+
+# Status icons by chemical risk level and by recommendation type
+RISK_COLORS = MappingProxyType({"low": "🟢", "medium": "🟡", "high": "🔴", "critical": "🚨"})
+RECOMMENDATION_COLORS = MappingProxyType({"consume": "🟢", "limit": "🟡", "avoid": "🔴"})
+
+# Fields of AnalysisResult read by the render_* methods
+ANALYSIS_SUMMARY_FIELDS = {
+    'session_id': True,
+    'timestamp': True,
+    'processing_time': True,
+    'confidence_score': True,
+    'model_version': True,
+    'nutrition_data': True,
+    'chemical_analysis': {'overall_risk_level', 'detected_chemicals'},
+    'health_recommendation': {
+        'overall_score', 'novi_score', 'recommendation_type', 'benefits', 'risks',
+        'allergen_warnings', 'health_condition_warnings', 'tips'
+    }
+}
+
+
+class AnalysisSummary(TypedDict):
+    """Primitive-only view of an AnalysisResult kept in session state"""
+    session_id: str
+    timestamp: str
+    processing_time: float
+    confidence_score: float
+    model_version: str
+    nutrition_data: Optional[dict]
+    chemical_analysis: dict
+    health_recommendation: dict
+
+
+def summarize_analysis(result: AnalysisResult) -> AnalysisSummary:
+    """Reduce an AnalysisResult to the primitives the UI renders"""
+    summary = json.loads(result.json(include=ANALYSIS_SUMMARY_FIELDS))
+    summary['timestamp'] = result.timestamp.strftime('%Y-%m-%d %H:%M:%S')
+    return summary
+
+
 # Page configuration
 st.set_page_config(
     page_title="Food Quality Analyzer Pro",
@@ -36,11 +118,159 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+
+@st.cache_resource(show_spinner=False)
+def _init_database() -> bool:
+    """Create database tables once per process"""
+    create_tables()
+    return True
+
+
+@st.cache_resource(show_spinner=False)
+def _get_ocr_service() -> OCRService:
+    """Build the OCR service once and share it across reruns and sessions"""
+    return OCRService()
+
+
+@st.cache_resource(show_spinner=False)
+def _get_analysis_service() -> AnalysisService:
+    """Build the analysis service once and share it across reruns and sessions"""
+    return AnalysisService()
+
+
+@st.cache_resource(show_spinner=False)
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    """Run one background event loop per process so async clients keep their connection pools"""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="analysis-event-loop", daemon=True).start()
+    return loop
+
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def cached_ocr(image_digest: str, _image_bytes: bytes):
+    """Extract text from an uploaded image, memoized on the digest of its raw bytes"""
+    return _get_ocr_service().extract_text(Image.open(io.BytesIO(_image_bytes)))
+
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def cached_analysis(extracted_text: str, profile_json: Optional[str]) -> AnalysisResult:
+    """Run the comprehensive analysis, memoized on OCR text and user profile.
+
+    The cached result is shared across sessions, so callers must stamp their
+    own session_id and timestamp on it.
+    """
+    user_profile = UserProfile.parse_raw(profile_json) if profile_json else None
+    return asyncio.run_coroutine_threadsafe(
+        _get_analysis_service().analyze_food_comprehensive(
+            extracted_text=extracted_text,
+            user_profile=user_profile,
+            session_id=f"streamlit_{int(time.time())}"
+        ),
+        _get_event_loop()
+    ).result()
+
+
+def _history_key() -> tuple:
+    """Identify the current session's analysis history without hashing its contents"""
+    history = st.session_state.analysis_history
+    last_timestamp = history[-1]['timestamp'] if history else ''
+    return (st.session_state.session_key, st.session_state.running_stats['count'], last_timestamp)
+
+
+@st.cache_data(show_spinner=False, ttl=30, max_entries=64)
+def load_history(history_key: tuple) -> list:
+    """Load the session's recent analysis history from the database, oldest first"""
+    db = SessionLocal()
+    try:
+        return get_analysis_history(db, history_key[0], limit=MAX_HISTORY_ENTRIES)
+    finally:
+        db.close()
+
+
+def _chart_history(history_key: tuple) -> list:
+    """Get the history used for charts, falling back to session state if the database is unavailable"""
+    try:
+        history = load_history(history_key)
+    except Exception as e:
+        logger.warning(f"Could not load analysis history: {str(e)}")
+        history = None
+    return history or list(st.session_state.analysis_history)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def history_df(history_key: tuple, _history: list) -> "pd.DataFrame":
+    """Build the analysis history DataFrame, memoized on the history key"""
+    import pandas as pd
+    return pd.DataFrame(_history)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def chemical_counts(history_key: tuple, _history: list) -> "pd.Series":
+    """Count detected chemicals across the history, memoized on the history key"""
+    import pandas as pd
+    all_chemicals = list(chain.from_iterable(a.get('detected_chemicals', ()) for a in _history))
+    return pd.Series(all_chemicals, dtype=object).value_counts()
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def health_trend_fig(history_key: tuple, _history: list) -> "go.Figure":
+    """Build the health score trend chart, memoized on the history key"""
+    import plotly.express as px
+    fig = px.line(history_df(history_key, _history), y='health_score', title='Health Score Trend')
+    fig.update_layout(showlegend=False)
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def risk_distribution_fig(history_key: tuple, _history: list) -> Optional["go.Figure"]:
+    """Build the risk level pie chart, memoized on the history key"""
+    import plotly.express as px
+    df = history_df(history_key, _history)
+    risk_counts = df['risk_level'].value_counts() if 'risk_level' in df.columns else {}
+    if not risk_counts.any():
+        return None
+    return px.pie(values=risk_counts.values, names=risk_counts.index,
+                  title='Risk Level Distribution')
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def chemical_frequency_fig(history_key: tuple, _history: list) -> Optional["go.Figure"]:
+    """Build the most-detected chemicals bar chart, memoized on the history key"""
+    import plotly.express as px
+    counts = chemical_counts(history_key, _history)
+    if counts.empty:
+        return None
+    return px.bar(x=counts.index[:10], y=counts.values[:10],
+                  title='Most Frequently Detected Chemicals')
+
+
+def metrics_trend_fig(history: list) -> "go.Figure":
+    """Build the multi-metric trend chart with one trace per TREND_METRICS entry"""
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    
+    for metric in TREND_METRICS:
+        fig.add_trace(go.Scatter(
+            y=[entry[metric] for entry in history],
+            mode='lines+markers',
+            name=metric.replace('_', ' ').title()
+        ))
+    
+    fig.update_layout(title='Health Metrics Over Time')
+    return fig
+
+
+def append_to_metrics_trend(fig: "go.Figure", history_entry: dict):
+    """Append a new analysis to the trend chart's traces in place"""
+    for trace, metric in zip(fig.data, TREND_METRICS):
+        trace.y = (tuple(trace.y) + (history_entry[metric],))[-MAX_HISTORY_ENTRIES:]
+
+
 # Initialize database
-create_tables()
+_init_database()
 
 # Custom CSS for professional styling
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     .main-header {
         background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
@@ -80,27 +310,40 @@ st.markdown("""
         background-color: #667eea;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
 
 
 class FoodAnalyzerApp:
     """Main Streamlit application class"""
     
     def __init__(self):
-        self.ocr_service = OCRService()
-        self.analysis_service = AnalysisService()
+        self.ocr_service = _get_ocr_service()
+        self.analysis_service = _get_analysis_service()
         self.initialize_session_state()
     
     def initialize_session_state(self):
         """Initialize session state variables"""
         if 'analysis_history' not in st.session_state:
-            st.session_state.analysis_history = []
+            st.session_state.analysis_history = deque(maxlen=SESSION_HISTORY_ENTRIES)
+        if 'running_stats' not in st.session_state:
+            st.session_state.running_stats = {
+                'sum_health': 0.0,
+                'sum_novi': 0.0,
+                'high_risk': 0,
+                'count': 0
+            }
         if 'user_profile' not in st.session_state:
             st.session_state.user_profile = None
         if 'current_analysis' not in st.session_state:
             st.session_state.current_analysis = None
         if 'processing' not in st.session_state:
             st.session_state.processing = False
+        if 'session_key' not in st.session_state:
+            st.session_state.session_key = uuid.uuid4().hex
+    
+    def render_styles(self):
+        """Render custom CSS; it must be emitted on every run or Streamlit drops it"""
+        st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
     
     def render_header(self):
         """Render application header"""
@@ -115,74 +358,80 @@ class FoodAnalyzerApp:
     def render_sidebar(self):
         """Render sidebar with user profile and settings"""
         with st.sidebar:
-            st.markdown("## 👤 User Profile")
+            self.render_sidebar_content()
+    
+    @fragment
+    def render_sidebar_content(self):
+        """Render sidebar content; as a fragment, its widgets don't rerun the main panel"""
+        st.markdown("## 👤 User Profile")
+        
+        # User profile form
+        with st.form("user_profile_form"):
+            st.markdown("### Personal Information")
+            name = st.text_input("Name", value="")
+            email = st.text_input("Email", value="")
             
-            # User profile form
-            with st.form("user_profile_form"):
-                st.markdown("### Personal Information")
-                name = st.text_input("Name", value="")
-                email = st.text_input("Email", value="")
-                
-                st.markdown("### Health Profile")
-                allergies = st.text_area(
-                    "Allergies (one per line)",
-                    placeholder="gluten\npeanuts\nlactose\nsoy"
-                )
-                
-                dietary_restrictions = st.text_area(
-                    "Dietary Restrictions (one per line)",
-                    placeholder="vegetarian\nlow sodium\nketo\ndiabetic"
-                )
-                
-                health_conditions = st.text_area(
-                    "Health Conditions (one per line)",
-                    placeholder="diabetes\nhypertension\nheart disease"
-                )
-                
-                age_group = st.selectbox(
-                    "Age Group",
-                    ["", "child", "teen", "adult", "senior"]
-                )
-                
-                activity_level = st.selectbox(
-                    "Activity Level",
-                    ["", "sedentary", "light", "moderate", "active", "very_active"]
-                )
-                
-                if st.form_submit_button("Save Profile", type="primary"):
-                    profile_data = {
-                        "name": name,
-                        "email": email,
-                        "allergies": [a.strip() for a in allergies.split('\n') if a.strip()],
-                        "dietary_restrictions": [r.strip() for r in dietary_restrictions.split('\n') if r.strip()],
-                        "health_conditions": [c.strip() for c in health_conditions.split('\n') if c.strip()],
-                        "age_group": age_group if age_group else None,
-                        "activity_level": activity_level if activity_level else None
-                    }
-                    
-                    try:
-                        st.session_state.user_profile = UserProfile(**profile_data)
-                        st.success("✅ Profile saved successfully!")
-                    except Exception as e:
-                        st.error(f"❌ Profile validation error: {str(e)}")
+            st.markdown("### Health Profile")
+            allergies = st.text_area(
+                "Allergies (one per line)",
+                placeholder="gluten\npeanuts\nlactose\nsoy"
+            )
             
-            # Analysis history
-            st.markdown("## 📊 Analysis History")
-            if st.session_state.analysis_history:
-                for i, analysis in enumerate(reversed(st.session_state.analysis_history[-5:])):
-                    with st.expander(f"Analysis {len(st.session_state.analysis_history) - i}"):
-                        st.write(f"**Time:** {analysis['timestamp']}")
-                        st.write(f"**Health Score:** {analysis['health_score']:.1f}/10")
-                        st.write(f"**NOVI Score:** {analysis['novi_score']:.1f}/100")
-            else:
-                st.info("No analysis history yet")
+            dietary_restrictions = st.text_area(
+                "Dietary Restrictions (one per line)",
+                placeholder="vegetarian\nlow sodium\nketo\ndiabetic"
+            )
             
-            # Settings
-            st.markdown("## ⚙️ Settings")
-            st.checkbox("Enable detailed logging", value=False)
-            st.checkbox("Save analysis history", value=True)
-            st.selectbox("Language", ["English", "Spanish", "French"])
-    
+            health_conditions = st.text_area(
+                "Health Conditions (one per line)",
+                placeholder="diabetes\nhypertension\nheart disease"
+            )
+            
+            age_group = st.selectbox(
+                "Age Group",
+                ["", "child", "teen", "adult", "senior"]
+            )
+            
+            activity_level = st.selectbox(
+                "Activity Level",
+                ["", "sedentary", "light", "moderate", "active", "very_active"]
+            )
+            
+            if st.form_submit_button("Save Profile", type="primary"):
+                profile_data = {
+                    "name": name,
+                    "email": email,
+                    "allergies": [a.strip() for a in allergies.split('\n') if a.strip()],
+                    "dietary_restrictions": [r.strip() for r in dietary_restrictions.split('\n') if r.strip()],
+                    "health_conditions": [c.strip() for c in health_conditions.split('\n') if c.strip()],
+                    "age_group": age_group if age_group else None,
+                    "activity_level": activity_level if activity_level else None
+                }
+                
+                try:
+                    st.session_state.user_profile = UserProfile(**profile_data)
+                    st.success("✅ Profile saved successfully!")
+                except Exception as e:
+                    st.error(f"❌ Profile validation error: {str(e)}")
+        
+        # Analysis history
+        st.markdown("## 📊 Analysis History")
+        if st.session_state.analysis_history:
+            total = st.session_state.running_stats['count']
+            for i, analysis in enumerate(islice(reversed(st.session_state.analysis_history), 5)):
+                with st.expander(f"Analysis {total - i}"):
+                    st.write(f"**Time:** {analysis['timestamp']}")
+                    st.write(f"**Health Score:** {analysis['health_score']:.1f}/10")
+                    st.write(f"**NOVI Score:** {analysis['novi_score']:.1f}/100")
+        else:
+            st.info("No analysis history yet")
+        
+        # Settings
+        st.markdown("## ⚙️ Settings")
+        st.checkbox("Enable detailed logging", value=False)
+        st.checkbox("Save analysis history", value=True)
+        st.selectbox("Language", ["English", "Spanish", "French"])
+
     def render_main_content(self):
         """Render main content area"""
         tab1, tab2, tab3, tab4 = st.tabs([
@@ -218,17 +467,29 @@ class FoodAnalyzerApp:
             )
             
             if uploaded_file is not None:
-                # Display image
-                image = Image.open(uploaded_file)
+                # Snapshot the upload once; images and cache keys derive from these bytes
+                image_bytes = uploaded_file.getvalue()
+                image_digest = hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+                if st.session_state.get('last_upload_digest') != image_digest:
+                    st.session_state.last_upload_digest = image_digest
+                    st.session_state.last_upload_bytes = image_bytes
+                
+                # Opening is lazy, so the original size only needs the header
+                image = Image.open(io.BytesIO(image_bytes))
+                original_size = image.size
+                
+                # Display a downscaled preview; OCR decodes the full image itself
+                image.draft("RGB", PREVIEW_SIZE)
+                image.thumbnail(PREVIEW_SIZE, Image.Resampling.LANCZOS)
                 st.image(image, caption="Uploaded Nutrition Label", use_column_width=True)
                 
                 # Image quality assessment
-                quality_score = self.assess_image_quality(image)
+                quality_score = self.assess_image_quality(image, original_size)
                 self.render_quality_indicator(quality_score)
                 
                 # Analysis button
                 if st.button("🔍 Analyze Nutrition Label", type="primary", disabled=st.session_state.processing):
-                    self.process_image_analysis(image)
+                    self.process_image_analysis(image_digest)
         
         with col2:
             if st.session_state.current_analysis:
@@ -241,6 +502,7 @@ class FoodAnalyzerApp:
                 if st.button("Load Sample Nutrition Label"):
                     st.info("Sample image feature - would load a demo nutrition label")
     
+    @fragment
     def render_dashboard_tab(self):
         """Render dashboard with metrics and insights"""
         st.markdown("## 📊 Personal Health Dashboard")
@@ -252,12 +514,16 @@ class FoodAnalyzerApp:
         # Metrics overview
         col1, col2, col3, col4 = st.columns(4)
         
-        analyses = st.session_state.analysis_history
-        avg_health_score = sum(a['health_score'] for a in analyses) / len(analyses)
-        avg_novi_score = sum(a['novi_score'] for a in analyses) / len(analyses)
+        # Aggregates are maintained incrementally as analyses are added
+        stats = st.session_state.running_stats
+        avg_health_score = stats['sum_health'] / stats['count']
+        avg_novi_score = stats['sum_novi'] / stats['count']
+        high_risk_count = stats['high_risk']
+        history_key = _history_key()
+        history = _chart_history(history_key)
         
         with col1:
-            st.metric("Total Analyses", len(analyses))
+            st.metric("Total Analyses", stats['count'])
         
         with col2:
             st.metric("Avg Health Score", f"{avg_health_score:.1f}/10")
@@ -266,7 +532,6 @@ class FoodAnalyzerApp:
             st.metric("Avg NOVI Score", f"{avg_novi_score:.1f}/100")
         
         with col4:
-            high_risk_count = sum(1 for a in analyses if a.get('risk_level') == 'high')
             st.metric("High Risk Products", high_risk_count)
         
         # Charts
@@ -274,19 +539,16 @@ class FoodAnalyzerApp:
         
         with col1:
             # Health score trend
-            df = pd.DataFrame(analyses)
-            fig = px.line(df, y='health_score', title='Health Score Trend')
-            fig.update_layout(showlegend=False)
+            fig = health_trend_fig(history_key, history)
             st.plotly_chart(fig, use_container_width=True)
         
         with col2:
             # Risk level distribution
-            risk_counts = df['risk_level'].value_counts() if 'risk_level' in df.columns else {}
-            if risk_counts.any():
-                fig = px.pie(values=risk_counts.values, names=risk_counts.index, 
-                           title='Risk Level Distribution')
+            fig = risk_distribution_fig(history_key, history)
+            if fig is not None:
                 st.plotly_chart(fig, use_container_width=True)
     
+    @fragment
     def render_analytics_tab(self):
         """Render analytics and insights"""
         st.markdown("## 📈 Advanced Analytics")
@@ -299,38 +561,23 @@ class FoodAnalyzerApp:
         st.markdown("### 🧪 Chemical Analysis Insights")
         
         # Most common chemicals detected
-        all_chemicals = []
-        for analysis in st.session_state.analysis_history:
-            if 'detected_chemicals' in analysis:
-                all_chemicals.extend(analysis['detected_chemicals'])
-        
-        if all_chemicals:
-            chemical_counts = pd.Series(all_chemicals).value_counts()
-            fig = px.bar(x=chemical_counts.index[:10], y=chemical_counts.values[:10],
-                        title='Most Frequently Detected Chemicals')
+        history_key = _history_key()
+        history = _chart_history(history_key)
+        fig = chemical_frequency_fig(history_key, history)
+        
+        if fig is not None:
             st.plotly_chart(fig, use_container_width=True)
         
         # Nutrition trends
         st.markdown("### 📊 Nutrition Trends")
         
-        if len(st.session_state.analysis_history) > 1:
-            df = pd.DataFrame(st.session_state.analysis_history)
-            
-            # Multi-metric trend
-            metrics = ['health_score', 'novi_score']
-            fig = go.Figure()
-            
-            for metric in metrics:
-                if metric in df.columns:
-                    fig.add_trace(go.Scatter(
-                        y=df[metric],
-                        mode='lines+markers',
-                        name=metric.replace('_', ' ').title()
-                    ))
-            
-            fig.update_layout(title='Health Metrics Over Time')
-            st.plotly_chart(fig, use_container_width=True)
+        if len(history) > 1:
+            # Multi-metric trend, built once per session and extended as analyses are added
+            if st.session_state.get('analytics_fig') is None:
+                st.session_state.analytics_fig = metrics_trend_fig(history)
+            st.plotly_chart(st.session_state.analytics_fig, use_container_width=True)
     
+    @fragment
     def render_about_tab(self):
         """Render about and help information"""
         st.markdown("## ℹ️ About Food Quality Analyzer Pro")
@@ -386,13 +633,13 @@ class FoodAnalyzerApp:
             "Value": ["2.3 seconds", "98.5%", "4.7/5.0"],
             "Status": ["🟢 Good", "🟢 Excellent", "🟢 Excellent"]
         }
-        st.table(pd.DataFrame(metrics_data))
+        st.table(metrics_data)
     
-    def assess_image_quality(self, image: Image.Image) -> float:
+    def assess_image_quality(self, image: Image.Image, original_size: Optional[tuple] = None) -> float:
         """Assess image quality for OCR suitability"""
         try:
-            # Simple quality assessment based on image properties
-            width, height = image.size
+            # Size and shape of the upload, which may be larger than the preview
+            width, height = original_size or image.size
             
             # Size score
             size_score = min(1.0, (width * height) / (800 * 600))
@@ -401,8 +648,12 @@ class FoodAnalyzerApp:
             aspect_ratio = width / height
             aspect_score = 1.0 if 0.5 <= aspect_ratio <= 2.0 else 0.5
             
+            # Contrast/sharpness (Laplacian variance) on a small grayscale sample
+            gray = np.asarray(image.convert("L").resize(QUALITY_SAMPLE_SIZE))
+            content_score = self.ocr_service.image_processor.calculate_image_quality(gray)
+            
             # Overall quality score
-            quality_score = (size_score + aspect_score) / 2
+            quality_score = (size_score + aspect_score + content_score) / 3
             
             return quality_score
             
@@ -418,7 +669,7 @@ class FoodAnalyzerApp:
         else:
             st.error(f"🔴 Image Quality: Poor ({quality_score:.1%}) - Consider retaking the photo")
     
-    def process_image_analysis(self, image: Image.Image):
+    def process_image_analysis(self, image_digest: str):
         """Process image analysis with progress tracking"""
         st.session_state.processing = True
         
@@ -430,7 +681,7 @@ class FoodAnalyzerApp:
             status_text.text("🔍 Extracting text from image...")
             progress_bar.progress(25)
             
-            ocr_result = self.ocr_service.extract_text(image)
+            ocr_result = cached_ocr(image_digest, st.session_state.last_upload_bytes)
             
             if not ocr_result.text.strip():
                 st.error("❌ Could not extract text from image. Please try a clearer image.")
@@ -440,24 +691,21 @@ class FoodAnalyzerApp:
             status_text.text("🧠 Analyzing nutrition data and chemicals...")
             progress_bar.progress(50)
             
-            # Run async analysis
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            analysis_result = loop.run_until_complete(
-                self.analysis_service.analyze_food_comprehensive(
-                    extracted_text=ocr_result.text,
-                    user_profile=st.session_state.user_profile,
-                    session_id=f"streamlit_{int(time.time())}"
-                )
-            )
+            user_profile = st.session_state.user_profile
+            analysis_result = cached_analysis(
+                ocr_result.text,
+                user_profile.json() if user_profile else None
+            ).copy(update={
+                'session_id': f"streamlit_{int(time.time())}",
+                'timestamp': datetime.now()
+            })
             
             # Step 3: Processing results
             status_text.text("📊 Processing results...")
             progress_bar.progress(75)
             
-            # Store results
-            st.session_state.current_analysis = analysis_result
+            # Store only the fields the results view reads
+            st.session_state.current_analysis = summarize_analysis(analysis_result)
             
             # Add to history
             history_entry = {
@@ -469,6 +717,17 @@ class FoodAnalyzerApp:
             }
             st.session_state.analysis_history.append(history_entry)
             
+            stats = st.session_state.running_stats
+            stats['sum_health'] += history_entry['health_score']
+            stats['sum_novi'] += history_entry['novi_score']
+            stats['high_risk'] += history_entry['risk_level'] == 'high'
+            stats['count'] += 1
+            
+            self.persist_history_entry(history_entry)
+            
+            if st.session_state.get('analytics_fig') is not None:
+                append_to_metrics_trend(st.session_state.analytics_fig, history_entry)
+            
             # Complete
             progress_bar.progress(100)
             status_text.text("✅ Analysis completed!")
@@ -485,28 +744,40 @@ class FoodAnalyzerApp:
             progress_bar.empty()
             status_text.empty()
     
-    def render_analysis_results(self, analysis: AnalysisResult):
+    def persist_history_entry(self, history_entry: dict):
+        """Store a history entry in the database so charts don't depend on session state"""
+        db = SessionLocal()
+        try:
+            save_analysis_history(db, [{'session_key': st.session_state.session_key, **history_entry}])
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not persist analysis history: {str(e)}")
+        finally:
+            db.close()
+    
+    def render_analysis_results(self, analysis: AnalysisSummary):
         """Render comprehensive analysis results"""
         st.markdown("## 📊 Analysis Results")
         
+        rec = analysis['health_recommendation']
+        
         # Overall scores
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            score = analysis.health_recommendation.overall_score
+            score = rec['overall_score']
             color = "🟢" if score >= 7 else "🟡" if score >= 4 else "🔴"
             st.metric("Health Score", f"{score:.1f}/10", delta=None)
             st.markdown(f"{color} **{self.get_score_description(score)}**")
         
         with col2:
-            novi = analysis.health_recommendation.novi_score
+            novi = rec['novi_score']
             st.metric("NOVI Score", f"{novi:.1f}/100")
         
         with col3:
-            risk_level = analysis.chemical_analysis.overall_risk_level.value
-            risk_color = {"low": "🟢", "medium": "🟡", "high": "🔴", "critical": "🚨"}
+            risk_level = analysis['chemical_analysis']['overall_risk_level']
             st.metric("Risk Level", risk_level.title())
-            st.markdown(f"{risk_color.get(risk_level, '⚪')} **{risk_level.title()} Risk**")
+            st.markdown(f"{RISK_COLORS.get(risk_level, '⚪')} **{risk_level.title()} Risk**")
         
         # Detailed results in tabs
         result_tab1, result_tab2, result_tab3, result_tab4 = st.tabs([
@@ -525,34 +796,22 @@ class FoodAnalyzerApp:
         with result_tab4:
             self.render_summary(analysis)
     
-    def render_nutrition_results(self, analysis: AnalysisResult):
+    def render_nutrition_results(self, analysis: AnalysisSummary):
         """Render nutrition analysis results"""
         st.markdown("### 🥗 Nutritional Analysis")
         
-        if analysis.nutrition_data:
-            nutrition = analysis.nutrition_data
+        if analysis['nutrition_data']:
+            nutrition = analysis['nutrition_data']
             
             # Create nutrition facts table
-            nutrition_facts = []
-            
-            if nutrition.calories:
-                nutrition_facts.append(["Calories", f"{nutrition.calories}", "kcal"])
-            if nutrition.total_fat:
-                nutrition_facts.append(["Total Fat", f"{nutrition.total_fat}", "g"])
-            if nutrition.saturated_fat:
-                nutrition_facts.append(["Saturated Fat", f"{nutrition.saturated_fat}", "g"])
-            if nutrition.sodium:
-                nutrition_facts.append(["Sodium", f"{nutrition.sodium}", "mg"])
-            if nutrition.total_carbohydrates:
-                nutrition_facts.append(["Total Carbohydrates", f"{nutrition.total_carbohydrates}", "g"])
-            if nutrition.dietary_fiber:
-                nutrition_facts.append(["Dietary Fiber", f"{nutrition.dietary_fiber}", "g"])
-            if nutrition.total_sugars:
-                nutrition_facts.append(["Total Sugars", f"{nutrition.total_sugars}", "g"])
-            if nutrition.protein:
-                nutrition_facts.append(["Protein", f"{nutrition.protein}", "g"])
+            nutrition_facts = [
+                (label, f"{nutrition[field]}", unit)
+                for field, label, unit in NUTRIENT_SPEC
+                if nutrition.get(field)
+            ]
             
             if nutrition_facts:
+                import pandas as pd
                 df = pd.DataFrame(nutrition_facts, columns=["Nutrient", "Amount", "Unit"])
                 st.table(df)
             else:
@@ -560,94 +819,113 @@ class FoodAnalyzerApp:
         else:
             st.warning("No nutrition data could be extracted from the image")
     
-    def render_chemical_results(self, analysis: AnalysisResult):
+    def render_chemical_results(self, analysis: AnalysisSummary):
         """Render chemical analysis results"""
         st.markdown("### 🧪 Chemical Analysis")
         
-        chemicals = analysis.chemical_analysis.detected_chemicals
+        chemicals = analysis['chemical_analysis']['detected_chemicals']
         
-        if chemicals:
+        if not chemicals:
+            st.success("🎉 No concerning chemicals detected!")
+        elif st.checkbox("Show detailed view", value=False, key="chemical_details_verbose"):
             for chemical in chemicals:
-                risk_class = f"risk-{chemical.risk_level.value}"
+                risk_level = chemical['risk_level']
                 
-                with st.expander(f"{chemical.name} - {chemical.risk_level.value.title()} Risk"):
-                    st.markdown(f"**Category:** {chemical.category.replace('_', ' ').title()}")
-                    st.markdown(f"**Risk Level:** {chemical.risk_level.value.title()}")
-                    st.markdown(f"**Description:** {chemical.description}")
+                with st.expander(f"{chemical['name']} - {risk_level.title()} Risk"):
+                    # One markdown element per chemical instead of one per line
+                    blocks = [
+                        f"**Category:** {chemical['category'].replace('_', ' ').title()}",
+                        f"**Risk Level:** {risk_level.title()}",
+                        f"**Description:** {chemical['description']}"
+                    ]
                     
-                    if chemical.health_effects:
-                        st.markdown("**Health Effects:**")
-                        for effect in chemical.health_effects:
-                            st.markdown(f"- {effect}")
+                    if chemical['health_effects']:
+                        blocks.append(self._markdown_list("**Health Effects:**", chemical['health_effects']))
                     
-                    if chemical.alternatives:
-                        st.markdown("**Healthier Alternatives:**")
-                        for alt in chemical.alternatives:
-                            st.markdown(f"- {alt}")
+                    if chemical['alternatives']:
+                        blocks.append(self._markdown_list("**Healthier Alternatives:**", chemical['alternatives']))
+                    
+                    st.markdown("\n\n".join(blocks))
         else:
-            st.success("🎉 No concerning chemicals detected!")
+            # All chemicals as one pre-rendered element of collapsible sections
+            st.markdown(self._chemicals_html(chemicals), unsafe_allow_html=True)
+    
+    def _chemicals_html(self, chemicals: list) -> str:
+        """Render detected chemicals as escaped, collapsible HTML sections"""
+        sections = []
+        for chemical in chemicals:
+            risk_level = html.escape(chemical['risk_level'].title())
+            parts = [
+                f"<details><summary>{html.escape(chemical['name'])} - {risk_level} Risk</summary>",
+                f"<p><b>Category:</b> {html.escape(chemical['category'].replace('_', ' ').title())}</p>",
+                f"<p><b>Risk Level:</b> {risk_level}</p>",
+                f"<p><b>Description:</b> {html.escape(chemical['description'])}</p>"
+            ]
+            
+            if chemical['health_effects']:
+                parts.append(self._html_list("Health Effects:", chemical['health_effects']))
+            
+            if chemical['alternatives']:
+                parts.append(self._html_list("Healthier Alternatives:", chemical['alternatives']))
+            
+            parts.append("</details>")
+            sections.append("".join(parts))
+        return "".join(sections)
+    
+    @staticmethod
+    def _html_list(heading: str, items: list) -> str:
+        """Format a heading and items as an escaped HTML list"""
+        list_items = "".join(f"<li>{html.escape(item)}</li>" for item in items)
+        return f"<p><b>{html.escape(heading)}</b></p><ul>{list_items}</ul>"
     
-    def render_recommendations(self, analysis: AnalysisResult):
+    def render_recommendations(self, analysis: AnalysisSummary):
         """Render health recommendations"""
         st.markdown("### 💡 Personalized Recommendations")
         
-        rec = analysis.health_recommendation
+        rec = analysis['health_recommendation']
         
         # Recommendation type
-        rec_colors = {
-            "consume": "🟢",
-            "limit": "🟡", 
-            "avoid": "🔴"
-        }
-        
-        st.markdown(f"{rec_colors.get(rec.recommendation_type, '⚪')} **Recommendation: {rec.recommendation_type.title()}**")
+        rec_type = rec['recommendation_type']
+        st.markdown(f"{RECOMMENDATION_COLORS.get(rec_type, '⚪')} **Recommendation: {rec_type.title()}**")
         
         # Benefits and risks
         col1, col2 = st.columns(2)
         
         with col1:
-            if rec.benefits:
-                st.markdown("#### ✅ Benefits")
-                for benefit in rec.benefits:
-                    st.markdown(f"- {benefit}")
+            if rec['benefits']:
+                st.markdown(self._markdown_list("#### ✅ Benefits", rec['benefits']))
         
         with col2:
-            if rec.risks:
-                st.markdown("#### ⚠️ Risks")
-                for risk in rec.risks:
-                    st.markdown(f"- {risk}")
+            if rec['risks']:
+                st.markdown(self._markdown_list("#### ⚠️ Risks", rec['risks']))
         
         # Warnings
-        if rec.allergen_warnings:
-            st.error("🚨 **Allergen Warnings:**")
-            for warning in rec.allergen_warnings:
-                st.error(f"- {warning}")
+        if rec['allergen_warnings']:
+            st.error(self._markdown_list("🚨 **Allergen Warnings:**", rec['allergen_warnings']))
         
-        if rec.health_condition_warnings:
-            st.warning("⚠️ **Health Condition Warnings:**")
-            for warning in rec.health_condition_warnings:
-                st.warning(f"- {warning}")
+        if rec['health_condition_warnings']:
+            st.warning(self._markdown_list("⚠️ **Health Condition Warnings:**", rec['health_condition_warnings']))
         
         # Usage tips
-        if rec.tips:
-            st.markdown("#### 💡 Tips")
-            for tip in rec.tips:
-                st.markdown(f"- {tip}")
+        if rec['tips']:
+            st.markdown(self._markdown_list("#### 💡 Tips", rec['tips']))
     
-    def render_summary(self, analysis: AnalysisResult):
+    def render_summary(self, analysis: AnalysisSummary):
         """Render analysis summary"""
         st.markdown("### 📋 Analysis Summary")
         
+        chemical_analysis = analysis['chemical_analysis']
+        rec = analysis['health_recommendation']
         summary_data = {
-            "Analysis ID": analysis.session_id,
-            "Timestamp": analysis.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-            "Processing Time": f"{analysis.processing_time:.2f} seconds",
-            "Confidence Score": f"{analysis.confidence_score:.1%}",
-            "Model Version": analysis.model_version,
-            "Chemicals Detected": len(analysis.chemical_analysis.detected_chemicals),
-            "Overall Risk": analysis.chemical_analysis.overall_risk_level.value.title(),
-            "Health Score": f"{analysis.health_recommendation.overall_score:.1f}/10",
-            "NOVI Score": f"{analysis.health_recommendation.novi_score:.1f}/100"
+            "Analysis ID": analysis['session_id'],
+            "Timestamp": analysis['timestamp'],
+            "Processing Time": f"{analysis['processing_time']:.2f} seconds",
+            "Confidence Score": f"{analysis['confidence_score']:.1%}",
+            "Model Version": analysis['model_version'],
+            "Chemicals Detected": len(chemical_analysis['detected_chemicals']),
+            "Overall Risk": chemical_analysis['overall_risk_level'].title(),
+            "Health Score": f"{rec['overall_score']:.1f}/10",
+            "NOVI Score": f"{rec['novi_score']:.1f}/100"
         }
         
         for key, value in summary_data.items():
@@ -669,6 +947,11 @@ class FoodAnalyzerApp:
             if st.button("📧 Email Report"):
                 st.info("Email feature - would send report to user")
     
+    @staticmethod
+    def _markdown_list(heading: str, items: list) -> str:
+        """Format a heading and bullet items as a single markdown block"""
+        return "\n".join([heading, *(f"- {item}" for item in items)])
+    
     def get_score_description(self, score: float) -> str:
         """Get description for health score"""
         if score >= 8:
@@ -682,6 +965,7 @@ class FoodAnalyzerApp:
     
     def run(self):
         """Run the Streamlit application"""
+        self.render_styles()
         self.render_header()
         self.render_sidebar()
         self.render_main_content()
@@ -4,101 +4,418 @@ Features: User registration, login, role-based access, session management
 """
 
 import streamlit as st
+import atexit
 import hashlib
+import hmac
+import os
+import queue
+import secrets
 import sqlite3
+import string
+import threading
+import time
 import uuid
-from datetime import datetime, timedelta
+from types import MappingProxyType
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
 from typing import Optional, Dict, List
 import jwt
 import re
 
+DEFAULT_DB_PATH = "Food_Quality_Analyzer/users.db"
+
+# Shared salt used before per-user salts were introduced; only needed to
+# verify and upgrade accounts created by older versions.
+LEGACY_SALT = b"food_analyzer_salt"
+
+# Default admin account ("admin123"), pre-hashed with PBKDF2 at
+# AuthenticationSystem.PBKDF2_ITERATIONS so startup never has to hash it
+DEFAULT_ADMIN_SALT = "ee69883f4fea2295b87bd167aa894502"
+DEFAULT_ADMIN_HASH = "9da6cdc6deb59d79b7d7bae8f2d77228f456b0278ba95effa41f3e16259ac174"
+
+# Accounts behind the login page's demo buttons; copy into a dict before
+# storing in session state, which must stay picklable
+DEMO_USER = MappingProxyType({
+    'id': 'demo-user',
+    'username': 'demo_user',
+    'email': 'demo@example.com',
+    'role': 'user'
+})
+DEMO_ADMIN = MappingProxyType({
+    'id': 'demo-admin',
+    'username': 'admin',
+    'email': 'admin@example.com',
+    'role': 'admin'
+})
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+# Allowed bytes for each part of EMAIL_PATTERN, used by scan_email
+_ASCII_LETTERS = string.ascii_letters.encode()
+_EMAIL_LOCAL_CHARS = _ASCII_LETTERS + string.digits.encode() + b"._%+-"
+_EMAIL_DOMAIN_CHARS = _ASCII_LETTERS + string.digits.encode() + b".-"
+
+# Character classes required by validate_password
+_ASCII_UPPER = frozenset(string.ascii_uppercase)
+_ASCII_LOWER = frozenset(string.ascii_lowercase)
+
+# Columns returned to callers as the logged-in user
+_USER_FIELDS = ('id', 'username', 'email', 'role')
+
+# Hot-path statements, kept as constants so each pooled connection's
+# statement cache reuses the prepared form
+_SQL_SELECT_AUTH = '''
+    SELECT id, username, email, password_hash, role, is_active, salt
+    FROM users
+    WHERE username = ? OR email = ?
+'''
+_SQL_INSERT_USER = '''
+    INSERT INTO users (id, username, email, password_hash, salt)
+    VALUES (?, ?, ?, ?, ?)
+'''
+_SQL_LOG_ATTEMPT = '''
+    INSERT INTO login_attempts (username, success, attempted_at)
+    VALUES (?, ?, ?)
+'''
+_SQL_UPGRADE_HASH = 'UPDATE users SET password_hash = ?, salt = ? WHERE id = ?'
+_SQL_UPDATE_LAST_LOGIN = 'UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?'
+_SQL_INSERT_SESSION = '''
+    INSERT INTO user_sessions (session_id, user_id, expires_at)
+    VALUES (?, ?, CAST(strftime('%s', 'now') AS INTEGER) + ?)
+'''
+_SQL_VALIDATE_SESSION = '''
+    SELECT u.id, u.username, u.email, u.role, s.expires_at
+    FROM user_sessions s
+    JOIN users u ON s.user_id = u.id
+    WHERE s.session_id = ? AND s.is_active = 1 AND u.is_active = 1
+'''
+_SQL_INVALIDATE_SESSION = 'UPDATE user_sessions SET is_active = 0 WHERE session_id = ?'
+_SQL_LOAD_SESSIONS = '''
+    INSERT INTO user_sessions (session_id, user_id, created_at, expires_at, is_active)
+    SELECT session_id, user_id, created_at, expires_at, is_active
+    FROM disk.user_sessions
+    WHERE is_active = 1 AND expires_at > ?
+'''
+_SQL_SELECT_SESSION_ROW = '''
+    SELECT session_id, user_id, created_at, expires_at, is_active
+    FROM user_sessions
+    WHERE session_id = ?
+'''
+_SQL_UPSERT_SESSION = '''
+    INSERT INTO user_sessions (session_id, user_id, created_at, expires_at, is_active)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (session_id) DO UPDATE
+    SET expires_at = excluded.expires_at, is_active = excluded.is_active
+'''
+_SQL_DELETE_SESSION = 'DELETE FROM user_sessions WHERE session_id = ?'
+_SQL_DELETE_EXPIRED_SESSIONS = 'DELETE FROM user_sessions WHERE expires_at <= ?'
+
+def scan_email(email: str) -> bool:
+    """Match EMAIL_PATTERN with a single table-driven scan instead of the regex engine"""
+    try:
+        raw = email.encode('ascii')
+    except UnicodeEncodeError:
+        return False
+    
+    # bytes.translate with delete= strips allowed bytes; anything left is invalid
+    local, at, domain = raw.partition(b'@')
+    if not local or not at or local.translate(None, _EMAIL_LOCAL_CHARS):
+        return False
+    
+    host, dot, tld = domain.rpartition(b'.')
+    if not host or not dot or len(tld) < 2:
+        return False
+    
+    return not host.translate(None, _EMAIL_DOMAIN_CHARS) and not tld.translate(None, _ASCII_LETTERS)
+
 class AuthenticationSystem:
     """Complete authentication and user management system"""
     
-    def __init__(self, db_path: str = "Food_Quality_Analyzer/users.db"):
+    POOL_SIZE = 8
+    PBKDF2_ITERATIONS = 100_000
+    SALT_BYTES = 16
+    USE_EMAIL_REGEX = False
+    SESSION_CACHE_SIZE = 4096
+    SESSION_CACHE_TTL = 60  # seconds before a cached session is re-checked
+    LOGIN_LOG_INTERVAL = 0.1  # seconds the writer waits to fill a batch
+    LOGIN_LOG_BATCH = 200
+    LAST_LOGIN_INTERVAL = 60  # seconds between last_login writes per user
+    SESSION_LIFETIME = 7 * 24 * 3600  # seconds
+    SESSION_DUMP_INTERVAL = 300  # seconds between in-memory session dumps
+    
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
         self.db_path = db_path
         self.secret_key = "your-secret-key-change-in-production"
+        self._pool = queue.Queue(maxsize=self.POOL_SIZE)
+        self._session_cache: OrderedDict[str, tuple[float, Dict]] = OrderedDict()
+        self._session_lock = threading.Lock()
+        self._session_generation = 0  # bumped by every invalidate_session
+        self._attempt_queue: queue.Queue = queue.Queue()
+        self._last_login_writes: Dict[str, float] = {}
         self.init_database()
-    
-    def init_database(self):
-        """Initialize user database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
         
-        # Users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id TEXT PRIMARY KEY,
-                username TEXT UNIQUE NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                role TEXT DEFAULT 'user',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_login TIMESTAMP,
-                is_active BOOLEAN DEFAULT 1,
-                profile_data TEXT,
-                preferences TEXT
-            )
-        ''')
+        # Sessions are disposable and churn constantly, so they live in an
+        # in-memory database that is dumped to disk periodically and at exit
+        self._sessions_lock = threading.Lock()
+        self._sessions_db = self._open_sessions_db()
+        self._dirty_sessions: set = set()  # created or invalidated since the last dump
+        atexit.register(self.persist_sessions)
+        threading.Thread(
+            target=self._session_dumper, name="session-dumper", daemon=True
+        ).start()
+        
+        # Login attempts are audit-only, so they are written off the login path
+        threading.Thread(
+            target=self._login_attempt_writer, name="login-attempt-writer", daemon=True
+        ).start()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new pooled connection and apply PRAGMAs once"""
+        # Autocommit mode: transactions are opened explicitly where needed
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA cache_size=-20000')
+        conn.execute('PRAGMA mmap_size=268435456')
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    @contextmanager
+    def _conn(self):
+        """Borrow a connection from the pool and return it when done"""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
         
-        # Sessions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_sessions (
+        try:
+            yield conn
+        finally:
+            # Drop uncommitted work so the next borrower starts clean
+            if conn.in_transaction:
+                conn.rollback()
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+    
+    def _open_sessions_db(self) -> sqlite3.Connection:
+        """Create the in-memory session store, seeded from the on-disk copy"""
+        conn = sqlite3.connect(':memory:', check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        
+        # users and login_attempts resolve to the attached file database
+        conn.execute('ATTACH DATABASE ? AS disk', (self.db_path,))
+        conn.execute('''
+            CREATE TABLE user_sessions (
                 session_id TEXT PRIMARY KEY,
                 user_id TEXT NOT NULL,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                expires_at TIMESTAMP NOT NULL,
-                is_active BOOLEAN DEFAULT 1,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # Login attempts table (security)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS login_attempts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT,
-                ip_address TEXT,
-                success BOOLEAN,
-                attempted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                expires_at INTEGER NOT NULL,
+                is_active BOOLEAN DEFAULT 1
             )
         ''')
+        conn.execute(_SQL_LOAD_SESSIONS, (int(time.time()),))
+        return conn
+    
+    @contextmanager
+    def _sessions(self):
+        """Use the in-memory session store; one thread at a time"""
+        with self._sessions_lock:
+            conn = self._sessions_db
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+    
+    def persist_sessions(self):
+        """Write sessions this process created or invalidated to disk.
+        
+        Other processes share the on-disk table, so only our own changes are
+        upserted or deleted. The disk write runs on a pooled connection,
+        outside the session store lock.
+        """
+        with self._sessions() as conn:
+            dirty, self._dirty_sessions = self._dirty_sessions, set()
+            rows = [conn.execute(_SQL_SELECT_SESSION_ROW, (session_id,)).fetchone() for session_id in dirty]
+        
+        now = int(time.time())
+        live = [tuple(row) for row in rows if row and row['is_active'] and row['expires_at'] > now]
+        dead = dirty.difference(row[0] for row in live)
         
-        # Create default admin user if not exists
-        cursor.execute('SELECT COUNT(*) FROM users WHERE role = "admin"')
-        if cursor.fetchone()[0] == 0:
-            admin_id = str(uuid.uuid4())
-            admin_password = self.hash_password("admin123")
+        try:
+            with self._conn() as conn:
+                conn.execute('BEGIN IMMEDIATE')
+                conn.executemany(_SQL_UPSERT_SESSION, live)
+                conn.executemany(_SQL_DELETE_SESSION, ((session_id,) for session_id in dead))
+                conn.execute(_SQL_DELETE_EXPIRED_SESSIONS, (now,))
+                conn.commit()
+        except sqlite3.Error:
+            # Retry these sessions on the next dump
+            with self._sessions():
+                self._dirty_sessions |= dirty
+            raise
+    
+    def _session_dumper(self):
+        """Dump sessions every SESSION_DUMP_INTERVAL seconds"""
+        while True:
+            time.sleep(self.SESSION_DUMP_INTERVAL)
+            try:
+                self.persist_sessions()
+            except sqlite3.Error:
+                pass  # Try again on the next interval
+    
+    def _login_attempt_writer(self):
+        """Drain queued login attempts into the database in batches"""
+        while True:
+            batch = [self._attempt_queue.get()]
+            deadline = time.monotonic() + self.LOGIN_LOG_INTERVAL
+            while len(batch) < self.LOGIN_LOG_BATCH:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._attempt_queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            
+            try:
+                with self._conn() as conn:
+                    conn.execute('BEGIN')
+                    conn.executemany(_SQL_LOG_ATTEMPT, batch)
+                    conn.commit()
+            except sqlite3.Error:
+                pass  # Auditing must never take the writer thread down
+            finally:
+                for _ in batch:
+                    self._attempt_queue.task_done()
+    
+    def log_login_attempt(self, username: str, success: bool):
+        """Queue a login attempt for the background writer"""
+        attempted_at = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        self._attempt_queue.put((username, success, attempted_at))
+    
+    def flush_login_attempts(self):
+        """Block until every queued login attempt has been written"""
+        self._attempt_queue.join()
+    
+    def init_database(self):
+        """Initialize user database"""
+        with self._conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN')
+            
+            # Users table
             cursor.execute('''
-                INSERT INTO users (id, username, email, password_hash, role)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (admin_id, "admin", "admin@foodanalyzer.com", admin_password, "admin"))
-        
-        conn.commit()
-        conn.close()
+                CREATE TABLE IF NOT EXISTS users (
+                    id TEXT PRIMARY KEY,
+                    username TEXT UNIQUE NOT NULL,
+                    email TEXT UNIQUE NOT NULL,
+                    password_hash TEXT NOT NULL,
+                    role TEXT DEFAULT 'user',
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_login TIMESTAMP,
+                    is_active BOOLEAN DEFAULT 1,
+                    profile_data TEXT,
+                    preferences TEXT,
+                    salt TEXT
+                )
+            ''')
+            
+            # Older databases predate per-user salts
+            columns = {row[1] for row in cursor.execute('PRAGMA table_info(users)')}
+            if 'salt' not in columns:
+                cursor.execute('ALTER TABLE users ADD COLUMN salt TEXT')
+            
+            # Sessions table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS user_sessions (
+                    session_id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    expires_at INTEGER NOT NULL,
+                    is_active BOOLEAN DEFAULT 1,
+                    FOREIGN KEY (user_id) REFERENCES users (id)
+                )
+            ''')
+            
+            # Session expiry used to be stored as a local-time ISO string
+            cursor.execute('''
+                UPDATE user_sessions
+                SET expires_at = CAST(strftime('%s', expires_at, 'utc') AS INTEGER)
+                WHERE typeof(expires_at) = 'text'
+            ''')
+            
+            # Login attempts table (security)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS login_attempts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT,
+                    ip_address TEXT,
+                    success BOOLEAN,
+                    attempted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Sessions are validated against the in-memory store, so the
+            # on-disk session index is never read
+            cursor.execute('DROP INDEX IF EXISTS idx_sessions_active')
+            
+            # Indexes for admin statistics
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_login_attempted_at
+                ON login_attempts (attempted_at)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_users_created_at
+                ON users (created_at) WHERE is_active = 1
+            ''')
+            
+            # Create default admin user if no admin exists
+            cursor.execute('''
+                INSERT OR IGNORE INTO users (id, username, email, password_hash, role, salt)
+                SELECT ?, ?, ?, ?, ?, ?
+                WHERE NOT EXISTS (SELECT 1 FROM users WHERE role = 'admin')
+            ''', (str(uuid.uuid4()), "admin", "admin@foodanalyzer.com", DEFAULT_ADMIN_HASH, "admin", DEFAULT_ADMIN_SALT))
+            
+            conn.commit()
+            
+            # Refresh planner statistics so the indexes above get picked
+            cursor.execute('ANALYZE')
+    
+    def hash_password(self, password: str, salt: bytes) -> str:
+        """Hash password with PBKDF2-HMAC-SHA256 and a per-user salt"""
+        return hashlib.pbkdf2_hmac(
+            'sha256', password.encode(), salt, self.PBKDF2_ITERATIONS
+        ).hex()
     
-    def hash_password(self, password: str) -> str:
-        """Hash password with salt"""
-        salt = "food_analyzer_salt"  # In production, use random salt per user
-        return hashlib.sha256((password + salt).encode()).hexdigest()
+    def _legacy_hash_password(self, password: str) -> str:
+        """Hash password the way accounts without a salt column were stored"""
+        return hashlib.sha256(password.encode() + LEGACY_SALT).hexdigest()
     
     def validate_email(self, email: str) -> bool:
         """Validate email format"""
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return re.match(pattern, email) is not None
+        if self.USE_EMAIL_REGEX:
+            return EMAIL_PATTERN.match(email) is not None
+        return scan_email(email)
     
     def validate_password(self, password: str) -> tuple[bool, str]:
         """Validate password strength"""
         if len(password) < 8:
             return False, "Password must be at least 8 characters long"
         
-        if not re.search(r'[A-Z]', password):
+        # Set operations keep every per-character step in C
+        chars = set(password)
+        
+        if _ASCII_UPPER.isdisjoint(chars):
             return False, "Password must contain at least one uppercase letter"
         
-        if not re.search(r'[a-z]', password):
+        if _ASCII_LOWER.isdisjoint(chars):
             return False, "Password must contain at least one lowercase letter"
         
-        if not re.search(r'\d', password):
+        if not any(map(str.isdecimal, chars)):
             return False, "Password must contain at least one number"
         
         return True, "Password is valid"
@@ -117,185 +434,198 @@ class AuthenticationSystem:
         if not is_valid:
             return False, message
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        # Hash before touching the database so no write lock is held meanwhile
+        user_id = str(uuid.uuid4())
+        salt = os.urandom(self.SALT_BYTES)
+        password_hash = self.hash_password(password, salt)
         
-        try:
-            # Check if username or email already exists
-            cursor.execute('SELECT id FROM users WHERE username = ? OR email = ?', (username, email))
-            if cursor.fetchone():
-                return False, "Username or email already exists"
-            
-            # Create new user
-            user_id = str(uuid.uuid4())
-            password_hash = self.hash_password(password)
-            
-            cursor.execute('''
-                INSERT INTO users (id, username, email, password_hash)
-                VALUES (?, ?, ?, ?)
-            ''', (user_id, username, email, password_hash))
-            
-            conn.commit()
-            return True, "User registered successfully"
+        with self._conn() as conn:
+            cursor = conn.cursor()
             
-        except Exception as e:
-            return False, f"Registration failed: {str(e)}"
+            try:
+                # Create new user; the UNIQUE constraints reject duplicates
+                cursor.execute('BEGIN IMMEDIATE')
+                cursor.execute(_SQL_INSERT_USER, (user_id, username, email, password_hash, salt.hex()))
+                
+                conn.commit()
+                return True, "User registered successfully"
+                
+            except sqlite3.IntegrityError as e:
+                if 'users.username' in str(e):
+                    return False, "Username already exists"
+                if 'users.email' in str(e):
+                    return False, "Email already exists"
+                return False, "Username or email already exists"
+                
+            except Exception as e:
+                return False, f"Registration failed: {str(e)}"
+    
+    def verify_password(self, password: str, password_hash: str, salt: Optional[str]) -> bool:
+        """Check a password against a stored hash and hex salt"""
+        if salt:
+            candidate = self.hash_password(password, bytes.fromhex(salt))
+        else:
+            candidate = self._legacy_hash_password(password)
         
-        finally:
-            conn.close()
+        # Constant-time compare so response timing leaks nothing about the hash
+        return hmac.compare_digest(candidate, password_hash)
     
     def authenticate_user(self, username: str, password: str) -> tuple[bool, Optional[Dict]]:
         """Authenticate user login"""
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
             # Get user data
-            cursor.execute('''
-                SELECT id, username, email, password_hash, role, is_active
-                FROM users 
-                WHERE username = ? OR email = ?
-            ''', (username, username))
-            
-            user_data = cursor.fetchone()
-            
-            # Log login attempt
-            cursor.execute('''
-                INSERT INTO login_attempts (username, success)
-                VALUES (?, ?)
-            ''', (username, user_data is not None))
+            with self._conn() as conn:
+                cursor = conn.cursor()
+                cursor.execute(_SQL_SELECT_AUTH, (username, username))
+                
+                user_data = cursor.fetchone()
             
             if not user_data:
+                self.log_login_attempt(username, False)
                 return False, None
             
-            user_id, db_username, email, password_hash, role, is_active = user_data
+            user_id = user_data['id']
+            salt = user_data['salt']
             
             # Check if user is active
-            if not is_active:
+            if not user_data['is_active']:
+                self.log_login_attempt(username, False)
                 return False, None
             
-            # Verify password
-            if self.hash_password(password) != password_hash:
+            # Verify password outside any transaction; pbkdf2_hmac releases
+            # the GIL, so concurrent logins hash in parallel without holding
+            # the SQLite write lock
+            if not self.verify_password(password, user_data['password_hash'], salt):
+                self.log_login_attempt(username, False)
                 return False, None
             
-            # Update last login
-            cursor.execute('''
-                UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?
-            ''', (user_id,))
+            self.log_login_attempt(username, True)
             
-            conn.commit()
+            # last_login is informational, so repeat logins within
+            # LAST_LOGIN_INTERVAL skip the write; legacy upgrades always run
+            now = time.monotonic()
+            last_write = self._last_login_writes.get(user_id)
+            if not salt or last_write is None or now - last_write >= self.LAST_LOGIN_INTERVAL:
+                with self._conn() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute('BEGIN IMMEDIATE')
+                    
+                    if not salt:
+                        # Upgrade legacy account to a per-user salt
+                        new_salt = os.urandom(self.SALT_BYTES)
+                        cursor.execute(_SQL_UPGRADE_HASH, (self.hash_password(password, new_salt), new_salt.hex(), user_id))
+                    
+                    # Update last login
+                    cursor.execute(_SQL_UPDATE_LAST_LOGIN, (user_id,))
+                    
+                    conn.commit()
+                self._last_login_writes[user_id] = now
             
-            return True, {
-                'id': user_id,
-                'username': db_username,
-                'email': email,
-                'role': role
-            }
+            return True, {key: user_data[key] for key in _USER_FIELDS}
             
         except Exception as e:
             return False, None
-        
-        finally:
-            conn.close()
     
     def create_session(self, user_id: str) -> str:
         """Create user session"""
         
-        session_id = str(uuid.uuid4())
-        expires_at = datetime.now() + timedelta(days=7)  # 7 days expiry
+        session_id = secrets.token_hex(16)
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO user_sessions (session_id, user_id, expires_at)
-            VALUES (?, ?, ?)
-        ''', (session_id, user_id, expires_at))
-        
-        conn.commit()
-        conn.close()
+        with self._sessions() as conn:
+            cursor = conn.cursor()
+            
+            # SQLite computes the epoch expiry itself
+            cursor.execute(_SQL_INSERT_SESSION, (session_id, user_id, self.SESSION_LIFETIME))
+            self._dirty_sessions.add(session_id)
         
         return session_id
     
     def validate_session(self, session_id: str) -> Optional[Dict]:
         """Validate user session"""
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT u.id, u.username, u.email, u.role, s.expires_at
-            FROM user_sessions s
-            JOIN users u ON s.user_id = u.id
-            WHERE s.session_id = ? AND s.is_active = 1 AND u.is_active = 1
-        ''', (session_id,))
+        # Streamlit reruns on every interaction; serve repeat checks from memory
+        with self._session_lock:
+            cached = self._session_cache.get(session_id)
+            if cached and time.time() < cached[0]:
+                self._session_cache.move_to_end(session_id)
+                return dict(cached[1])
+            generation = self._session_generation
         
-        result = cursor.fetchone()
-        conn.close()
+        with self._sessions() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(_SQL_VALIDATE_SESSION, (session_id,))
+            
+            result = cursor.fetchone()
         
         if not result:
             return None
         
-        user_id, username, email, role, expires_at = result
+        expires_at = result['expires_at']
         
         # Check if session expired
-        if datetime.fromisoformat(expires_at) < datetime.now():
+        now = time.time()
+        if expires_at < now:
             self.invalidate_session(session_id)
             return None
         
-        return {
-            'id': user_id,
-            'username': username,
-            'email': email,
-            'role': role
-        }
+        user = {key: result[key] for key in _USER_FIELDS}
+        
+        # Re-check the database at least every SESSION_CACHE_TTL so
+        # deactivated users and expiring sessions are picked up promptly.
+        # Skip caching if a session was invalidated since the read above,
+        # so a concurrent logout can't be overwritten with a stale entry.
+        with self._session_lock:
+            if generation != self._session_generation:
+                return dict(user)
+            self._session_cache[session_id] = (min(expires_at, now + self.SESSION_CACHE_TTL), user)
+            self._session_cache.move_to_end(session_id)
+            while len(self._session_cache) > self.SESSION_CACHE_SIZE:
+                self._session_cache.popitem(last=False)
+        
+        return dict(user)
     
     def invalidate_session(self, session_id: str):
         """Invalidate user session"""
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        # Update the store before dropping the cache entry so any
+        # validate_session that read the old row sees the generation bump
+        with self._sessions() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(_SQL_INVALIDATE_SESSION, (session_id,))
+            self._dirty_sessions.add(session_id)
         
-        cursor.execute('''
-            UPDATE user_sessions SET is_active = 0 WHERE session_id = ?
-        ''', (session_id,))
+        with self._session_lock:
+            self._session_generation += 1
+            self._session_cache.pop(session_id, None)
+    
+    def count_users(self) -> int:
+        """Count all users, active or not"""
         
-        conn.commit()
-        conn.close()
+        with self._conn() as conn:
+            return conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
     
     def get_user_stats(self) -> Dict:
         """Get user statistics for admin dashboard"""
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Total users
-        cursor.execute('SELECT COUNT(*) FROM users WHERE is_active = 1')
-        total_users = cursor.fetchone()[0]
-        
-        # New users this month
-        cursor.execute('''
-            SELECT COUNT(*) FROM users 
-            WHERE is_active = 1 AND created_at >= date('now', 'start of month')
-        ''')
-        new_users_month = cursor.fetchone()[0]
-        
-        # Active sessions
-        cursor.execute('''
-            SELECT COUNT(*) FROM user_sessions 
-            WHERE is_active = 1 AND expires_at > datetime('now')
-        ''')
-        active_sessions = cursor.fetchone()[0]
-        
-        # Recent login attempts
-        cursor.execute('''
-            SELECT COUNT(*) FROM login_attempts 
-            WHERE attempted_at >= datetime('now', '-24 hours')
-        ''')
-        recent_attempts = cursor.fetchone()[0]
-        
-        conn.close()
+        self.flush_login_attempts()
+        
+        # Runs on the session store so user_sessions is the live in-memory
+        # table; users and login_attempts resolve to the attached file
+        with self._sessions() as conn:
+            # One statement instead of four round trips
+            total_users, new_users_month, active_sessions, recent_attempts = conn.execute('''
+                SELECT
+                    (SELECT COUNT(*) FROM users WHERE is_active = 1),
+                    (SELECT COUNT(*) FROM users
+                     WHERE is_active = 1 AND created_at >= date('now', 'start of month')),
+                    (SELECT COUNT(*) FROM user_sessions
+                     WHERE is_active = 1 AND expires_at > CAST(strftime('%s', 'now') AS INTEGER)),
+                    (SELECT COUNT(*) FROM login_attempts
+                     WHERE attempted_at >= datetime('now', '-24 hours'))
+            ''').fetchone()
         
         return {
             'total_users': total_users,
@@ -304,6 +634,35 @@ class AuthenticationSystem:
             'recent_attempts': recent_attempts
         }
 
+@st.cache_resource
+def get_auth_system(db_path: str = DEFAULT_DB_PATH) -> AuthenticationSystem:
+    """Shared AuthenticationSystem, so its schema setup, connection pool,
+    session cache and attempt writer survive Streamlit reruns"""
+    return AuthenticationSystem(db_path)
+
+USERS_PAGE_SIZE = 100
+USER_LIST_COLUMNS = ['Username', 'Email', 'Role', 'Created', 'Last Login', 'Active']
+
+@st.cache_data(ttl=30)
+def load_users_page(_auth_system: AuthenticationSystem, db_path: str, page: int):
+    """Load one page of the admin user list as a DataFrame"""
+    import pandas as pd
+    
+    with _auth_system._conn() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = None  # plain tuples for from_records
+        
+        cursor.execute('''
+            SELECT username, email, role, created_at, last_login, is_active
+            FROM users
+            ORDER BY created_at DESC
+            LIMIT ? OFFSET ?
+        ''', (USERS_PAGE_SIZE, page * USERS_PAGE_SIZE))
+        
+        rows = cursor.fetchmany(USERS_PAGE_SIZE)
+    
+    return pd.DataFrame.from_records(rows, columns=USER_LIST_COLUMNS)
+
 def show_login_page(auth_system: AuthenticationSystem):
     """Display login page"""
     
@@ -349,24 +708,12 @@ def show_login_page(auth_system: AuthenticationSystem):
         
         with col1:
             if st.button("👤 Demo User Login"):
-                st.session_state.authenticated = True
-                st.session_state.user_data = {
-                    'id': 'demo-user',
-                    'username': 'demo_user',
-                    'email': 'demo@example.com',
-                    'role': 'user'
-                }
+                st.session_state.update(authenticated=True, user_data=dict(DEMO_USER))
                 st.rerun()
         
         with col2:
             if st.button("👑 Admin Demo Login"):
-                st.session_state.authenticated = True
-                st.session_state.user_data = {
-                    'id': 'demo-admin',
-                    'username': 'admin',
-                    'email': 'admin@example.com',
-                    'role': 'admin'
-                }
+                st.session_state.update(authenticated=True, user_data=dict(DEMO_ADMIN))
                 st.rerun()
     
     with tab2:
@@ -482,23 +829,15 @@ def show_admin_panel(auth_system: AuthenticationSystem):
     with tab1:
         st.markdown("### 👥 User Management")
         
-        # List users
-        conn = sqlite3.connect(auth_system.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT username, email, role, created_at, last_login, is_active
-            FROM users
-            ORDER BY created_at DESC
-        ''')
-        
-        users = cursor.fetchall()
-        conn.close()
+        # List users, one page at a time
+        total = auth_system.count_users()
         
-        if users:
-            import pandas as pd
-            df = pd.DataFrame(users, columns=['Username', 'Email', 'Role', 'Created', 'Last Login', 'Active'])
+        if total:
+            pages = (total - 1) // USERS_PAGE_SIZE + 1
+            page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1)
+            df = load_users_page(auth_system, auth_system.db_path, int(page) - 1)
             st.dataframe(df, use_container_width=True)
+            st.caption(f"{total} users, page {int(page)} of {pages}")
         else:
             st.info("No users found")
     
@@ -8,19 +8,24 @@ import streamlit as st
 import os
 from dotenv import load_dotenv
 import json
+import re
 import time
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from PIL import Image
 import hashlib
+import importlib.util
 import io
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import csv
 import sqlite3
+import threading
+import atexit
 import base64
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
 import uuid
+import zlib
 
 # Load environment variables
 load_dotenv()
@@ -33,15 +38,10 @@ if 'analysis_history' not in st.session_state:
 if 'user_preferences' not in st.session_state:
     st.session_state.user_preferences = {}
 
-# Try to import required libraries
-try:
-    from groq import Groq
-    client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-    AI_AVAILABLE = True
-    WORKING_MODEL = "llama-3.1-8b-instant"
-except:
-    AI_AVAILABLE = False
-    WORKING_MODEL = None
+# Try to import required libraries. groq, cv2/numpy, pandas and plotly are
+# heavy, so they are only probed here and imported where they are used.
+AI_AVAILABLE = importlib.util.find_spec("groq") is not None and bool(os.getenv("GROQ_API_KEY"))
+WORKING_MODEL = "llama-3.1-8b-instant" if AI_AVAILABLE else None
 
 try:
     import pytesseract
@@ -49,138 +49,295 @@ try:
 except:
     OCR_AVAILABLE = False
 
-try:
-    import cv2
+CV2_AVAILABLE = importlib.util.find_spec("cv2") is not None and importlib.util.find_spec("numpy") is not None
+
+if TYPE_CHECKING:
     import numpy as np
-    CV2_AVAILABLE = True
-except:
-    CV2_AVAILABLE = False
+    import pandas as pd
+    import plotly.graph_objects as go
+
+@lru_cache(maxsize=None)
+def noise_kernel() -> "np.ndarray":
+    """Filter kernel used by OCRProcessor.estimate_noise, built once"""
+    import numpy as np
+    return np.array([[1,-2,1], [-2,4,-2], [1,-2,1]], dtype=np.float32)
+
+# Dashboard score buckets, highest first, matching get_analytics_data's SUM columns
+SCORE_CATEGORIES = ('Excellent (8-10)', 'Good (6-8)', 'Fair (4-6)', 'Poor (0-4)')
 
 class DatabaseManager:
     """Manage SQLite database for user data and analytics"""
     
     def __init__(self):
         self.db_path = "Food_Quality_Analyzer/enterprise_data.db"
+        # One connection for the manager's lifetime; autocommit, and the
+        # lock serialises use across Streamlit's script threads
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
         self.init_database()
+        atexit.register(self.optimize)
     
     def init_database(self):
         """Initialize database tables"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id TEXT PRIMARY KEY,
-                username TEXT UNIQUE,
-                email TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                preferences TEXT
-            )
-        ''')
-        
-        # Analysis history table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS analyses (
-                id TEXT PRIMARY KEY,
-                user_id TEXT,
-                product_name TEXT,
-                health_score REAL,
-                analysis_result TEXT,
-                image_hash TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # User sessions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS sessions (
-                session_id TEXT PRIMARY KEY,
-                user_id TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        with self._lock:
+            cursor = self.conn.cursor()
+            
+            # Connection tuning: WAL with relaxed fsync, in-memory temp
+            # tables, memory-mapped reads and a 64 MB page cache
+            cursor.executescript('''
+                PRAGMA journal_mode=WAL;
+                PRAGMA synchronous=NORMAL;
+                PRAGMA temp_store=MEMORY;
+                PRAGMA mmap_size=268435456;
+                PRAGMA cache_size=-65536;
+            ''')
+            
+            # Users table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS users (
+                    id TEXT PRIMARY KEY,
+                    username TEXT UNIQUE,
+                    email TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    preferences TEXT
+                )
+            ''')
+            
+            # Analysis history table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS analyses (
+                    id TEXT PRIMARY KEY,
+                    user_id TEXT,
+                    product_name TEXT,
+                    health_score REAL,
+                    analysis_result TEXT,
+                    image_hash TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES users (id)
+                )
+            ''')
+            
+            # User sessions table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    user_id TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Indexes for per-user history and score analytics
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_analyses_user_date
+                ON analyses (user_id, created_at DESC)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_analyses_score
+                ON analyses (health_score) WHERE health_score IS NOT NULL
+            ''')
+            # Day prefix of created_at, so daily counts are an index range scan
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_analyses_date_prefix
+                ON analyses (substr(created_at, 1, 10))
+            ''')
+            cursor.execute('ANALYZE')
+    
+    # Leading byte of a stored analysis_result; plain-text legacy rows have none
+    RESULT_FORMAT_ZLIB = b'\x01'
+    
+    @staticmethod
+    def _pack_result(text: str) -> bytes:
+        """Compress analysis text for storage, tagged with its format byte"""
+        return DatabaseManager.RESULT_FORMAT_ZLIB + zlib.compress(text.encode('utf-8'), 6)
+    
+    @staticmethod
+    def _unpack_result(value) -> Optional[str]:
+        """Inverse of _pack_result; rows saved before compression are returned as-is"""
+        if isinstance(value, bytes) and value[:1] == DatabaseManager.RESULT_FORMAT_ZLIB:
+            return zlib.decompress(value[1:]).decode('utf-8')
+        return value
+    
+    def _row_cursor(self) -> sqlite3.Cursor:
+        """Cursor yielding sqlite3.Row; the connection itself keeps plain
+        tuples so cached aggregate results stay picklable"""
+        cursor = self.conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        return cursor
+    
+    def optimize(self):
+        """Let SQLite refresh planner statistics before the process exits"""
+        with self._lock:
+            self.conn.execute('PRAGMA optimize')
+    
+    def data_version(self) -> int:
+        """Cheap change marker for analyses: the highest rowid written so far"""
+        with self._lock:
+            return self.conn.execute('SELECT MAX(rowid) FROM analyses').fetchone()[0] or 0
     
     def save_analysis(self, user_id: str, product_name: str, health_score: float, 
                      analysis_result: str, image_hash: str):
         """Save analysis to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        return self.save_analyses_bulk([(user_id, product_name, health_score, analysis_result, image_hash)])[0]
+    
+    def save_analyses_bulk(self, rows: List[tuple]) -> List[str]:
+        """Save (user_id, product_name, health_score, analysis_result, image_hash)
+        rows in a single transaction and return their new ids"""
+        analysis_ids = [str(uuid.uuid4()) for _ in rows]
+        # Compress before taking the lock
+        params = [(analysis_id, user_id, product_name, health_score,
+                   self._pack_result(analysis_result), image_hash)
+                  for analysis_id, (user_id, product_name, health_score, analysis_result, image_hash)
+                  in zip(analysis_ids, rows)]
         
-        analysis_id = str(uuid.uuid4())
-        cursor.execute('''
-            INSERT INTO analyses (id, user_id, product_name, health_score, 
-                                analysis_result, image_hash)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (analysis_id, user_id, product_name, health_score, analysis_result, image_hash))
+        with self._lock:
+            cursor = self.conn.cursor()
+            
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                cursor.executemany('''
+                    INSERT INTO analyses (id, user_id, product_name, health_score, 
+                                        analysis_result, image_hash)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', params)
+                cursor.execute('COMMIT')
+            except Exception:
+                cursor.execute('ROLLBACK')
+                raise
         
-        conn.commit()
-        conn.close()
-        return analysis_id
-    
-    def get_user_analyses(self, user_id: str, limit: int = 50) -> List[Dict]:
-        """Get user's analysis history"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        return analysis_ids
+    
+    # Columns the history queries may be ordered by
+    HISTORY_ORDER_COLUMNS = ('created_at', 'health_score')
+    
+    def _user_analyses_query(self, columns: str, user_id: str, limit: int,
+                             start_date=None, end_date=None,
+                             min_score: Optional[float] = None, max_score: Optional[float] = None,
+                             order_by: str = 'created_at', descending: bool = True) -> tuple:
+        """Build the SQL and parameters for a filtered history query; dates are
+        inclusive, scores are min_score <= score < max_score"""
+        if order_by not in self.HISTORY_ORDER_COLUMNS:
+            raise ValueError(f"Cannot order analyses by {order_by!r}")
         
-        cursor.execute('''
-            SELECT * FROM analyses 
-            WHERE user_id = ? 
-            ORDER BY created_at DESC 
-            LIMIT ?
-        ''', (user_id, limit))
+        # created_at is 'YYYY-MM-DD HH:MM:SS' text, so day bounds compare as
+        # strings and stay a range scan on idx_analyses_user_date
+        clauses, params = ['user_id = ?'], [user_id]
+        if start_date is not None:
+            clauses.append('created_at >= ?')
+            params.append(start_date.isoformat())
+        if end_date is not None:
+            clauses.append('created_at < ?')
+            params.append((end_date + timedelta(days=1)).isoformat())
+        if min_score is not None:
+            clauses.append('health_score >= ?')
+            params.append(min_score)
+        if max_score is not None:
+            clauses.append('health_score < ?')
+            params.append(max_score)
+        params.append(limit)
+        
+        # created_at is never NULL and its order comes straight from the index;
+        # unscored rows sort last, newest first among equal scores
+        ordering = f"{order_by} {'DESC' if descending else 'ASC'}"
+        if order_by != 'created_at':
+            ordering = f'{order_by} IS NULL, {ordering}, created_at DESC'
         
-        columns = [description[0] for description in cursor.description]
-        results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        sql = f'''
+            SELECT {columns}
+            FROM analyses
+            WHERE {' AND '.join(clauses)}
+            ORDER BY {ordering}
+            LIMIT ?
+        '''
+        return sql, params
+    
+    def get_user_analyses(self, user_id: str, limit: int = 50, **filters) -> List[Dict]:
+        """Get user's analysis history; filters as for _user_analyses_query"""
+        sql, params = self._user_analyses_query('*', user_id, limit, **filters)
+        with self._lock:
+            cursor = self._row_cursor()
+            cursor.execute(sql, params)
+            
+            results = list(map(dict, cursor))
         
-        conn.close()
+        for result in results:
+            result['analysis_result'] = self._unpack_result(result['analysis_result'])
         return results
     
-    def get_analytics_data(self) -> Dict:
-        """Get analytics data for dashboard"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Total analyses
-        cursor.execute('SELECT COUNT(*) FROM analyses')
-        total_analyses = cursor.fetchone()[0]
-        
-        # Average health score
-        cursor.execute('SELECT AVG(health_score) FROM analyses WHERE health_score IS NOT NULL')
-        avg_health_score = cursor.fetchone()[0] or 0
-        
-        # Analyses by date
-        cursor.execute('''
-            SELECT DATE(created_at) as date, COUNT(*) as count
-            FROM analyses
-            WHERE created_at >= date('now', '-30 days')
-            GROUP BY DATE(created_at)
-            ORDER BY date
-        ''')
-        daily_analyses = cursor.fetchall()
+    def get_user_analyses_summary(self, user_id: str, limit: int = 50, **filters) -> List[Dict]:
+        """Get user's analysis history without the full analysis text"""
+        sql, params = self._user_analyses_query(
+            'id, product_name, health_score, created_at', user_id, limit, **filters
+        )
+        with self._lock:
+            cursor = self._row_cursor()
+            cursor.execute(sql, params)
+            
+            return list(map(dict, cursor))
+    
+    def get_analysis_detail(self, analysis_id: str) -> Optional[str]:
+        """Get the full analysis text for one analysis"""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT analysis_result FROM analyses WHERE id = ?', (analysis_id,)
+            ).fetchone()
         
-        # Health score distribution
-        cursor.execute('''
-            SELECT 
-                CASE 
-                    WHEN health_score >= 8 THEN 'Excellent (8-10)'
-                    WHEN health_score >= 6 THEN 'Good (6-8)'
-                    WHEN health_score >= 4 THEN 'Fair (4-6)'
-                    ELSE 'Poor (0-4)'
-                END as category,
-                COUNT(*) as count
-            FROM analyses 
-            WHERE health_score IS NOT NULL
-            GROUP BY category
-        ''')
-        score_distribution = cursor.fetchall()
+        return self._unpack_result(row[0]) if row else None
+    
+    def get_user_summary(self, user_id: str) -> tuple:
+        """Get (analysis count, average non-zero health score) for a user"""
+        with self._lock:
+            return self.conn.execute('''
+                SELECT COUNT(*), AVG(NULLIF(health_score, 0))
+                FROM analyses
+                WHERE user_id = ?
+            ''', (user_id,)).fetchone()
+    
+    def get_analytics_data(self, user_id: Optional[str] = None) -> Dict:
+        """Get analytics data for dashboard, across all users or for one user"""
+        scope, scope_params = ('', ()) if user_id is None else ('WHERE user_id = ?', (user_id,))
         
-        conn.close()
+        with self._lock:
+            cursor = self.conn.cursor()
+            
+            # Total, average score and score distribution in one scan (of the
+            # user's index range when scoped); AVG and the comparisons skip NULL scores
+            cursor.execute(f'''
+                SELECT COUNT(*), AVG(health_score),
+                       SUM(health_score >= 8),
+                       SUM(health_score >= 6 AND health_score < 8),
+                       SUM(health_score >= 4 AND health_score < 6),
+                       SUM(health_score < 4)
+                FROM analyses
+                {scope}
+            ''', scope_params)
+            total_analyses, avg_health_score, *bucket_counts = cursor.fetchone()
+            avg_health_score = avg_health_score or 0
+            score_distribution = [(category, count)
+                                  for category, count in zip(SCORE_CATEGORIES, bucket_counts)
+                                  if count]
+            
+            # Analyses by date; created_at is stored as UTC text
+            cutoff = (datetime.now(timezone.utc) - timedelta(days=30)).strftime('%Y-%m-%d')
+            if user_id is None:
+                cursor.execute('''
+                    SELECT substr(created_at, 1, 10) as date, COUNT(*) as count
+                    FROM analyses
+                    WHERE substr(created_at, 1, 10) >= ?
+                    GROUP BY substr(created_at, 1, 10)
+                    ORDER BY date
+                ''', (cutoff,))
+            else:
+                # Range scan on idx_analyses_user_date; the day string sorts
+                # before every timestamp on that day
+                cursor.execute('''
+                    SELECT substr(created_at, 1, 10) as date, COUNT(*) as count
+                    FROM analyses
+                    WHERE user_id = ? AND created_at >= ?
+                    GROUP BY substr(created_at, 1, 10)
+                    ORDER BY date
+                ''', (user_id, cutoff))
+            daily_analyses = cursor.fetchall()
         
         return {
             'total_analyses': total_analyses,
@@ -192,45 +349,87 @@ class DatabaseManager:
 class OCRProcessor:
     """Advanced OCR processing with image enhancement"""
     
+    # Estimated noise sigma above which denoising is worth its cost
+    NOISE_SIGMA_THRESHOLD = 4.0
+    # Grey-level standard deviation below which an image counts as low contrast
+    CONTRAST_STD_THRESHOLD = 60.0
+    # Longest edge, in pixels, worth feeding to OpenCV and Tesseract
+    MAX_DIMENSION = 1600
+    
     @staticmethod
-    def enhance_image(image: Image.Image) -> Image.Image:
-        """Enhance image for better OCR results"""
-        if not CV2_AVAILABLE:
+    def limit_size(image: Image.Image) -> Image.Image:
+        """Downscale so the long edge is at most MAX_DIMENSION, keeping aspect ratio"""
+        width, height = image.size
+        longest = max(width, height)
+        if longest <= OCRProcessor.MAX_DIMENSION:
             return image
         
-        # Convert PIL to OpenCV
-        img_array = np.array(image)
-        if len(img_array.shape) == 3:
-            img_cv = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-        else:
-            img_cv = img_array
+        scale = OCRProcessor.MAX_DIMENSION
+        return image.resize((width * scale // longest, height * scale // longest), Image.LANCZOS)
+    
+    @staticmethod
+    def estimate_noise(gray: "np.ndarray") -> float:
+        """Fast noise sigma estimate (Immerkaer) from one 3x3 filter pass"""
+        import cv2
+        import numpy as np
         
-        # Convert to grayscale
-        gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
+        response = cv2.filter2D(gray, cv2.CV_32F, noise_kernel())
+        return float(np.abs(response).mean()) * np.sqrt(np.pi / 2) / 6
+    
+    @staticmethod
+    def contrast(gray: "np.ndarray") -> float:
+        """Global contrast as the grey-level standard deviation, in one pass"""
+        import cv2
+        
+        _, stddev = cv2.meanStdDev(gray)
+        return float(stddev[0, 0])
+    
+    @staticmethod
+    def to_gray(image: Image.Image) -> "np.ndarray":
+        """Size-bounded grayscale array, the one buffer OCR and barcode work share"""
+        import numpy as np
+        return np.asarray(OCRProcessor.limit_size(image).convert('L'))
+    
+    @staticmethod
+    def enhance_image(image: Union[Image.Image, "np.ndarray"]) -> Image.Image:
+        """Enhance image (PIL, or an array from to_gray) for better OCR results"""
+        if not CV2_AVAILABLE:
+            return image
+        import cv2
+        
+        # Convert PIL straight to grayscale; no intermediate RGB/BGR array
+        gray = OCRProcessor.to_gray(image) if isinstance(image, Image.Image) else image
         
         # Apply image enhancements
-        # 1. Noise reduction
-        denoised = cv2.fastNlMeansDenoising(gray)
+        # 1. Noise reduction, only when the image is actually noisy
+        if OCRProcessor.estimate_noise(gray) > OCRProcessor.NOISE_SIGMA_THRESHOLD:
+            gray = cv2.fastNlMeansDenoising(gray)
         
-        # 2. Contrast enhancement
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-        enhanced = clahe.apply(denoised)
+        # 2. Contrast enhancement, only when contrast is actually low
+        if OCRProcessor.contrast(gray) < OCRProcessor.CONTRAST_STD_THRESHOLD:
+            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
+            enhanced = clahe.apply(gray)
+        else:
+            enhanced = gray
         
-        # 3. Sharpening
-        kernel = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
-        sharpened = cv2.filter2D(enhanced, -1, kernel)
+        # 3. Sharpening: enhanced + 9 * (enhanced - 3x3 box blur), the classic
+        # centre-9 kernel split into a separable blur and one weighted add
+        blurred = cv2.blur(enhanced, (3, 3))
+        sharpened = cv2.addWeighted(enhanced, 10, blurred, -9, 0)
         
         # Convert back to PIL
         return Image.fromarray(sharpened)
     
     @staticmethod
-    def extract_text(image: Image.Image) -> str:
+    def extract_text(image: Union[Image.Image, "np.ndarray"]) -> str:
         """Extract text using Tesseract OCR"""
         if not OCR_AVAILABLE:
             return "OCR not available. Install pytesseract: pip install pytesseract"
         
         try:
-            # Enhance image first
+            # Bound the size, then enhance; arrays from to_gray are already bounded
+            if isinstance(image, Image.Image):
+                image = OCRProcessor.limit_size(image)
             enhanced_image = OCRProcessor.enhance_image(image)
             
             # OCR configuration for nutrition labels
@@ -243,21 +442,52 @@ class OCRProcessor:
         
         except Exception as e:
             return f"OCR Error: {str(e)}"
+    
+    @staticmethod
+    def extract_text_async(image: Union[Image.Image, "np.ndarray"]) -> Future:
+        """Run extract_text on the shared OCR pool"""
+        return get_ocr_executor().submit(OCRProcessor.extract_text, image)
+
+# Mock product database - in production, use real API like OpenFoodFacts.
+# Built once at import; lookup_product callers only read the entries.
+MOCK_PRODUCTS = {
+    "123456789012": {
+        "name": "Organic Granola Bar",
+        "brand": "Nature's Best",
+        "category": "Snacks",
+        "nutrition": {
+            "calories": 180,
+            "fat": 8,
+            "carbs": 24,
+            "protein": 6,
+            "sodium": 95
+        }
+    },
+    "987654321098": {
+        "name": "Chocolate Chip Cookies",
+        "brand": "Sweet Treats",
+        "category": "Cookies",
+        "nutrition": {
+            "calories": 250,
+            "fat": 12,
+            "carbs": 35,
+            "protein": 3,
+            "sodium": 180
+        }
+    }
+}
 
 class BarcodeScanner:
     """Barcode scanning and product lookup"""
     
     @staticmethod
-    def detect_barcode(image: Image.Image) -> Optional[str]:
+    def detect_barcode(image: Union[Image.Image, "np.ndarray"]) -> Optional[str]:
         """Detect barcode in image"""
         try:
             import pyzbar.pyzbar as pyzbar
             
-            # Convert PIL to numpy array
-            img_array = np.array(image)
-            
-            # Decode barcodes
-            barcodes = pyzbar.decode(img_array)
+            # Decode barcodes; pyzbar takes PIL images and grayscale arrays as-is
+            barcodes = pyzbar.decode(image)
             
             if barcodes:
                 return barcodes[0].data.decode('utf-8')
@@ -273,41 +503,154 @@ class BarcodeScanner:
     @staticmethod
     def lookup_product(barcode: str) -> Dict:
         """Look up product information by barcode"""
-        # Mock product database - in production, use real API like OpenFoodFacts
-        mock_products = {
-            "123456789012": {
-                "name": "Organic Granola Bar",
-                "brand": "Nature's Best",
-                "category": "Snacks",
-                "nutrition": {
-                    "calories": 180,
-                    "fat": 8,
-                    "carbs": 24,
-                    "protein": 6,
-                    "sodium": 95
-                }
-            },
-            "987654321098": {
-                "name": "Chocolate Chip Cookies",
-                "brand": "Sweet Treats",
-                "category": "Cookies",
-                "nutrition": {
-                    "calories": 250,
-                    "fat": 12,
-                    "carbs": 35,
-                    "protein": 3,
-                    "sodium": 180
-                }
-            }
-        }
-        
-        return mock_products.get(barcode, {
+        return MOCK_PRODUCTS.get(barcode, {
             "name": f"Product {barcode}",
             "brand": "Unknown",
             "category": "Food Product",
             "nutrition": None
         })
 
+@st.cache_resource
+def get_database() -> DatabaseManager:
+    """Shared DatabaseManager, so its SQLite connection survives reruns"""
+    return DatabaseManager()
+
+@st.cache_resource
+def get_ocr_executor() -> ThreadPoolExecutor:
+    """Shared worker pool for Tesseract, which releases the GIL while it runs"""
+    return ThreadPoolExecutor(max_workers=os.cpu_count() or 2, thread_name_prefix="ocr")
+
+@st.cache_resource
+def get_groq_client():
+    """Shared Groq client, created on the first AI analysis"""
+    from groq import Groq
+    return Groq(api_key=os.getenv("GROQ_API_KEY"))
+
+# Minimum seconds between live markdown updates when st.write_stream is missing
+STREAM_RENDER_INTERVAL = 0.1
+
+def stream_text(stream):
+    """Yield the non-empty text deltas of a streamed chat completion"""
+    for chunk in stream:
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
+
+def render_stream(deltas, placeholder) -> str:
+    """Render streamed text into placeholder and return the full text.
+
+    Uses st.write_stream where available; older Streamlit releases get a
+    markdown update at most every STREAM_RENDER_INTERVAL seconds.
+    """
+    if hasattr(st, 'write_stream'):
+        with placeholder.container():
+            return st.write_stream(deltas)
+    
+    parts = []
+    last_render = 0.0
+    for delta in deltas:
+        parts.append(delta)
+        now = time.monotonic()
+        if now - last_render >= STREAM_RENDER_INTERVAL:
+            placeholder.markdown(''.join(parts))
+            last_render = now
+    return ''.join(parts)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_user_analyses_summary(_db: DatabaseManager, user_id: str, limit: int, version: int,
+                                 filters: tuple = ()) -> List[Dict]:
+    """User history rows, reused across reruns until a new analysis is saved;
+    filters is a tuple of (keyword, value) pairs for get_user_analyses_summary"""
+    return _db.get_user_analyses_summary(user_id, limit, **dict(filters))
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_user_summary(_db: DatabaseManager, user_id: str, version: int) -> tuple:
+    """Sidebar stats, reused across reruns until a new analysis is saved"""
+    return _db.get_user_summary(user_id)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_analytics_data(_db: DatabaseManager, version: int, user_id: Optional[str] = None) -> Dict:
+    """Dashboard aggregates, reused across reruns until a new analysis is saved"""
+    return _db.get_analytics_data(user_id)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_recent_analyses_frame(_db: DatabaseManager, user_id: str, limit: int, version: int) -> "pd.DataFrame":
+    """Dashboard table of recent analyses, built once per data version"""
+    import numpy as np
+    import pandas as pd
+    
+    # Transpose the row dicts into columns once, with the dtypes already known,
+    # so pandas does no per-row inference
+    rows = cached_user_analyses_summary(_db, user_id, limit, version)
+    names, scores, timestamps = (
+        zip(*map(itemgetter('product_name', 'health_score', 'created_at'), rows)) if rows else ((), (), ())
+    )
+    return pd.DataFrame({
+        'product_name': pd.Series(names, dtype=object),
+        'health_score': np.array(scores, dtype=np.float64),
+        # created_at is 'YYYY-MM-DD HH:MM:SS'; trim the seconds without parsing it
+        'created_at': pd.Series([timestamp[:16] for timestamp in timestamps], dtype=object)
+    })
+
+@st.cache_data(ttl=600, show_spinner=False)
+def cached_analysis_detail(_db: DatabaseManager, analysis_id: str) -> Optional[str]:
+    """Full analysis text; saved analyses never change, so no version key"""
+    return _db.get_analysis_detail(analysis_id)
+
+# Plotly figures are costly to build and validate; build each distinct one
+# once per process. Callers must not mutate the returned figures.
+@st.cache_resource(max_entries=64, show_spinner=False)
+def health_gauge_figure(score: float) -> "go.Figure":
+    """Gauge chart for one health score"""
+    import plotly.graph_objects as go
+    
+    fig = go.Figure(go.Indicator(
+        mode = "gauge+number+delta",
+        value = score,
+        domain = {'x': [0, 1], 'y': [0, 1]},
+        title = {'text': "Health Rating"},
+        delta = {'reference': 5},
+        gauge = {
+            'axis': {'range': [None, 10]},
+            'bar': {'color': "darkblue"},
+            'steps': [
+                {'range': [0, 4], 'color': "lightgray"},
+                {'range': [4, 6], 'color': "yellow"},
+                {'range': [6, 8], 'color': "lightgreen"},
+                {'range': [8, 10], 'color': "green"}
+            ],
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': 9
+            }
+        }
+    ))
+    
+    fig.update_layout(height=300)
+    return fig
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def daily_trend_figure(daily_analyses: tuple) -> "go.Figure":
+    """Line chart of (date, count) rows"""
+    import plotly.graph_objects as go
+    
+    # graph_objects straight from the rows; no DataFrame or Express pass
+    dates, counts = zip(*daily_analyses)
+    fig = go.Figure(go.Scatter(x=dates, y=counts, mode='lines'))
+    fig.update_layout(title='Daily Analyses Trend', xaxis_title='Date', yaxis_title='Count', height=400)
+    return fig
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def score_distribution_figure(score_distribution: tuple) -> "go.Figure":
+    """Pie chart of (category, count) rows"""
+    import plotly.graph_objects as go
+    
+    categories, counts = zip(*score_distribution)
+    fig = go.Figure(go.Pie(labels=categories, values=counts))
+    fig.update_layout(title='Health Score Distribution', height=400)
+    return fig
+
 def main():
     st.set_page_config(
         page_title="Enterprise Food Analyzer",
@@ -317,7 +660,7 @@ def main():
     )
     
     # Initialize database
-    db = DatabaseManager()
+    db = get_database()
     
     # Sidebar navigation
     with st.sidebar:
@@ -335,11 +678,10 @@ def main():
         st.info(f"**ID**: {st.session_state.user_id[:8]}...")
         
         # Quick stats
-        user_analyses = db.get_user_analyses(st.session_state.user_id)
-        st.metric("Your Analyses", len(user_analyses))
+        analysis_count, avg_score = cached_user_summary(db, st.session_state.user_id, db.data_version())
+        st.metric("Your Analyses", analysis_count)
         
-        if user_analyses:
-            avg_score = sum(a['health_score'] for a in user_analyses if a['health_score']) / len([a for a in user_analyses if a['health_score']])
+        if avg_score is not None:
             st.metric("Avg Health Score", f"{avg_score:.1f}/10")
     
     # Main content based on selected page
@@ -407,6 +749,8 @@ def handle_image_upload(db: DatabaseManager):
         
         if uploaded_file:
             image = Image.open(uploaded_file)
+            # Shrink once so the preview and all processing share the copy
+            image.thumbnail((OCRProcessor.MAX_DIMENSION, OCRProcessor.MAX_DIMENSION), Image.LANCZOS)
             st.image(image, caption="Uploaded Image", width=400)
             
             # Image analysis options
@@ -537,52 +881,54 @@ def handle_manual_entry(db: DatabaseManager):
             else:
                 st.error("AI analysis not available")
 
-def handle_quick_demo(db: DatabaseManager):
-    """Handle quick demo analysis"""
-    
-    st.markdown("### 🎯 Quick Demo Analysis")
-    st.info("Try these sample products to see the AI analysis in action")
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        if st.button("🍟 Processed Snack", use_container_width=True):
-            demo_text = """
+DEMO_PRODUCTS = (
+    ("🍟 Processed Snack", "🍟 Processed Cheese Puffs", """
             Product: Cheese Puffs
             Calories: 320, Total Fat: 20g, Saturated Fat: 6g, Sodium: 580mg, 
             Sugars: 2g, Protein: 4g
             Ingredients: Corn meal, vegetable oil, cheese powder, salt, 
             monosodium glutamate, artificial colors (Yellow 6, Red 40), 
             BHT preservative, natural and artificial flavors
-            """
-            if AI_AVAILABLE:
-                analyze_nutrition_text(demo_text, "🍟 Processed Cheese Puffs", db)
-    
-    with col2:
-        if st.button("🥗 Healthy Snack", use_container_width=True):
-            demo_text = """
+            """),
+    ("🥗 Healthy Snack", "🥗 Organic Trail Mix", """
             Product: Organic Trail Mix
             Calories: 180, Total Fat: 12g, Saturated Fat: 2g, Sodium: 45mg,
             Fiber: 4g, Sugars: 8g, Protein: 7g
             Ingredients: Organic almonds, organic raisins, organic sunflower seeds,
             organic dark chocolate chips (organic cacao, organic cane sugar),
             sea salt
-            """
-            if AI_AVAILABLE:
-                analyze_nutrition_text(demo_text, "🥗 Organic Trail Mix", db)
-    
-    with col3:
-        if st.button("🥤 Beverage", use_container_width=True):
-            demo_text = """
+            """),
+    ("🥤 Beverage", "🥤 Energy Drink", """
             Product: Energy Drink
             Calories: 160, Total Fat: 0g, Sodium: 200mg, Sugars: 39g, Protein: 0g
             Ingredients: Carbonated water, high fructose corn syrup, citric acid,
             taurine, caffeine, artificial flavors, sodium benzoate, potassium sorbate,
             niacinamide, calcium pantothenate, pyridoxine HCl, vitamin B12,
             artificial colors (Blue 1, Red 40)
-            """
-            if AI_AVAILABLE:
-                analyze_nutrition_text(demo_text, "🥤 Energy Drink", db)
+            """),
+)
+
+def handle_quick_demo(db: DatabaseManager):
+    """Handle quick demo analysis"""
+    
+    st.markdown("### 🎯 Quick Demo Analysis")
+    st.info("Try these sample products to see the AI analysis in action")
+    
+    for col, (label, product_name, demo_text) in zip(st.columns(3), DEMO_PRODUCTS):
+        with col:
+            if st.button(label, use_container_width=True):
+                if AI_AVAILABLE:
+                    analyze_nutrition_text(demo_text, product_name, db)
+    
+    if st.button("🎯 Analyze All Samples", use_container_width=True) and AI_AVAILABLE:
+        # Save the whole batch in one transaction
+        results = [analyze_nutrition_text(demo_text, product_name, db, save=False)
+                   for _, product_name, demo_text in DEMO_PRODUCTS]
+        db.save_analyses_bulk([
+            (result['user_id'], result['product_name'], result['health_score'],
+             result['ai_analysis'], result['image_hash'])
+            for result in results if result
+        ])
 
 def analyze_uploaded_image(image: Image.Image, db: DatabaseManager, 
                           use_real_ocr: bool, enhance_image: bool, detect_barcode: bool):
@@ -590,17 +936,25 @@ def analyze_uploaded_image(image: Image.Image, db: DatabaseManager,
     
     with st.spinner("🔍 Processing image..."):
         
+        # Convert once; OCR and barcode detection share the grayscale array
+        pixels = OCRProcessor.to_gray(image) if CV2_AVAILABLE else image
+        
+        # Start OCR first so it overlaps barcode detection
+        ocr_future = None
+        if use_real_ocr and OCR_AVAILABLE:
+            ocr_future = OCRProcessor.extract_text_async(pixels)
+        
         # Step 1: Barcode detection
         barcode_result = None
         if detect_barcode:
-            barcode_result = BarcodeScanner.detect_barcode(image)
+            barcode_result = BarcodeScanner.detect_barcode(pixels)
             if barcode_result:
                 st.success(f"📦 Barcode detected: {barcode_result}")
         
         # Step 2: OCR processing
-        if use_real_ocr and OCR_AVAILABLE:
+        if ocr_future is not None:
             st.info("🔍 Extracting text with real OCR...")
-            nutrition_text = OCRProcessor.extract_text(image)
+            nutrition_text = ocr_future.result()
         else:
             st.info("🔍 Using simulated OCR...")
             nutrition_text = generate_nutrition_text_from_image(image)
@@ -620,7 +974,8 @@ def analyze_uploaded_image(image: Image.Image, db: DatabaseManager,
         else:
             st.error("AI analysis not available")
 
-def analyze_nutrition_text(nutrition_text: str, product_name: str, db: DatabaseManager):
+def analyze_nutrition_text(nutrition_text: str, product_name: str, db: DatabaseManager,
+                           save: bool = True) -> Optional[Dict]:
     """Analyze nutrition text with AI and save to database"""
     
     with st.spinner("🤖 AI is analyzing nutrition data..."):
@@ -656,14 +1011,18 @@ def analyze_nutrition_text(nutrition_text: str, product_name: str, db: DatabaseM
             Be specific, evidence-based, and practical in your advice.
             """
             
-            response = client.chat.completions.create(
+            stream = get_groq_client().chat.completions.create(
                 messages=[{"role": "user", "content": prompt}],
                 model=WORKING_MODEL,
                 temperature=0.2,
-                max_tokens=1000
+                max_tokens=1000,
+                stream=True
             )
             
-            ai_analysis = response.choices[0].message.content
+            # Show tokens as they arrive; show_analysis_results renders the final text
+            live_output = st.empty()
+            ai_analysis = render_stream(stream_text(stream), live_output)
+            live_output.empty()
             
             # Extract health score
             health_score = extract_health_score(ai_analysis)
@@ -677,18 +1036,19 @@ def analyze_nutrition_text(nutrition_text: str, product_name: str, db: DatabaseM
                 'health_score': health_score,
                 'model_used': WORKING_MODEL,
                 'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'user_id': st.session_state.user_id
+                'user_id': st.session_state.user_id,
+                'image_hash': hashlib.blake2b(nutrition_text.encode(), digest_size=16).hexdigest()
             }
             
-            # Save to database
-            image_hash = hashlib.md5(nutrition_text.encode()).hexdigest()
-            db.save_analysis(
-                st.session_state.user_id,
-                product_name,
-                health_score,
-                ai_analysis,
-                image_hash
-            )
+            # Save to database, unless the caller batches the insert itself
+            if save:
+                db.save_analysis(
+                    st.session_state.user_id,
+                    product_name,
+                    health_score,
+                    ai_analysis,
+                    analysis_result['image_hash']
+                )
             
             # Store in session state
             st.session_state.current_analysis = analysis_result
@@ -696,24 +1056,26 @@ def analyze_nutrition_text(nutrition_text: str, product_name: str, db: DatabaseM
             # Add to history
             st.session_state.analysis_history.append(analysis_result)
             
-            st.success("✅ Analysis complete and saved!")
+            st.success("✅ Analysis complete and saved!" if save else "✅ Analysis complete!")
+            return analysis_result
             
         except Exception as e:
             st.error(f"❌ AI Analysis Failed: {str(e)}")
+            return None
+
+# Health score patterns, most specific first
+HEALTH_SCORE_PATTERNS = [
+    re.compile(r'health\s+score[:\s]*(\d+(?:\.\d+)?)', re.IGNORECASE),
+    re.compile(r'score[:\s]*(\d+(?:\.\d+)?)', re.IGNORECASE),
+    re.compile(r'rating[:\s]*(\d+(?:\.\d+)?)', re.IGNORECASE)
+]
 
 def extract_health_score(analysis_text: str) -> Optional[float]:
     """Extract health score from AI analysis"""
-    import re
     
     # Look for health score patterns
-    patterns = [
-        r'health\s+score[:\s]*(\d+(?:\.\d+)?)',
-        r'score[:\s]*(\d+(?:\.\d+)?)',
-        r'rating[:\s]*(\d+(?:\.\d+)?)'
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, analysis_text.lower())
+    for pattern in HEALTH_SCORE_PATTERNS:
+        match = pattern.search(analysis_text)
         if match:
             score = float(match.group(1))
             if 0 <= score <= 10:
@@ -739,32 +1101,7 @@ def show_analysis_results(analysis: Dict):
     if analysis['health_score']:
         st.markdown("### 📊 Health Score")
         
-        # Create gauge chart
-        fig = go.Figure(go.Indicator(
-            mode = "gauge+number+delta",
-            value = analysis['health_score'],
-            domain = {'x': [0, 1], 'y': [0, 1]},
-            title = {'text': "Health Rating"},
-            delta = {'reference': 5},
-            gauge = {
-                'axis': {'range': [None, 10]},
-                'bar': {'color': "darkblue"},
-                'steps': [
-                    {'range': [0, 4], 'color': "lightgray"},
-                    {'range': [4, 6], 'color': "yellow"},
-                    {'range': [6, 8], 'color': "lightgreen"},
-                    {'range': [8, 10], 'color': "green"}
-                ],
-                'threshold': {
-                    'line': {'color': "red", 'width': 4},
-                    'thickness': 0.75,
-                    'value': 9
-                }
-            }
-        ))
-        
-        fig.update_layout(height=300)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(health_gauge_figure(analysis['health_score']), use_container_width=True)
         
         # Score interpretation
         score = analysis['health_score']
@@ -787,7 +1124,7 @@ def show_analysis_results(analysis: Dict):
     
     with col1:
         if st.button("🔄 Re-analyze"):
-            analyze_nutrition_text(analysis['nutrition_text'], analysis['product_name'], DatabaseManager())
+            analyze_nutrition_text(analysis['nutrition_text'], analysis['product_name'], get_database())
     
     with col2:
         if st.button("📋 New Analysis"):
@@ -808,8 +1145,12 @@ def show_analytics_dashboard(db: DatabaseManager):
     
     st.title("📊 Analytics Dashboard")
     
-    # Get analytics data
-    analytics = db.get_analytics_data()
+    # Get analytics data, for everyone or just this session's user
+    scope = st.radio("Show analytics for", ["All users", "My analyses"], horizontal=True)
+    version = db.data_version()
+    analytics = cached_analytics_data(
+        db, version, st.session_state.user_id if scope == "My analyses" else None
+    )
     
     # Key metrics
     col1, col2, col3, col4 = st.columns(4)
@@ -837,9 +1178,7 @@ def show_analytics_dashboard(db: DatabaseManager):
     with col1:
         # Daily analyses chart
         if analytics['daily_analyses']:
-            df_daily = pd.DataFrame(analytics['daily_analyses'], columns=['Date', 'Count'])
-            fig = px.line(df_daily, x='Date', y='Count', title='Daily Analyses Trend')
-            fig.update_layout(height=400)
+            fig = daily_trend_figure(tuple(analytics['daily_analyses']))
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("No daily analysis data available")
@@ -847,25 +1186,19 @@ def show_analytics_dashboard(db: DatabaseManager):
     with col2:
         # Health score distribution
         if analytics['score_distribution']:
-            df_scores = pd.DataFrame(analytics['score_distribution'], columns=['Category', 'Count'])
-            fig = px.pie(df_scores, values='Count', names='Category', 
-                        title='Health Score Distribution')
-            fig.update_layout(height=400)
+            fig = score_distribution_figure(tuple(analytics['score_distribution']))
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("No score distribution data available")
     
     # Recent analyses table
     st.markdown("### 📋 Recent Analyses")
-    recent_analyses = db.get_user_analyses(st.session_state.user_id, limit=10)
+    df = cached_recent_analyses_frame(db, st.session_state.user_id, 10, version)
     
-    if recent_analyses:
-        df = pd.DataFrame(recent_analyses)
-        df['created_at'] = pd.to_datetime(df['created_at']).dt.strftime('%Y-%m-%d %H:%M')
-        
+    if not df.empty:
         # Display table
         st.dataframe(
-            df[['product_name', 'health_score', 'created_at']],
+            df,
             column_config={
                 'product_name': 'Product',
                 'health_score': st.column_config.NumberColumn('Health Score', format="%.1f"),
@@ -876,15 +1209,27 @@ def show_analytics_dashboard(db: DatabaseManager):
     else:
         st.info("No analyses found. Start analyzing some products!")
 
+# Expanders rendered per page of the history list
+HISTORY_PAGE_SIZE = 20
+# History filter options: score bucket -> [min, max), sort label -> (column, descending)
+HISTORY_SCORE_RANGES = dict(zip(SCORE_CATEGORIES, ((8, 10), (6, 8), (4, 6), (0, 4))))
+HISTORY_SORTS = {
+    "Date (newest)": ('created_at', True),
+    "Date (oldest)": ('created_at', False),
+    "Score (highest)": ('health_score', True),
+    "Score (lowest)": ('health_score', False)
+}
+
 def show_history_page(db: DatabaseManager):
     """Show user's analysis history"""
     
     st.title("📋 Analysis History")
     
-    # Get user's analyses
-    analyses = db.get_user_analyses(st.session_state.user_id, limit=100)
+    # Get user's totals; rows are fetched below with the filters applied
+    version = db.data_version()
+    total_analyses, _ = cached_user_summary(db, st.session_state.user_id, version)
     
-    if not analyses:
+    if not total_analyses:
         st.info("No analysis history found. Start analyzing some products!")
         return
     
@@ -895,53 +1240,50 @@ def show_history_page(db: DatabaseManager):
         date_filter = st.date_input("Filter by date", value=None)
     
     with col2:
-        score_filter = st.selectbox("Filter by score", 
-                                   ["All", "Excellent (8-10)", "Good (6-8)", "Fair (4-6)", "Poor (0-4)"])
+        score_filter = st.selectbox("Filter by score", ["All", *HISTORY_SCORE_RANGES])
     
     with col3:
-        sort_by = st.selectbox("Sort by", ["Date (newest)", "Date (oldest)", "Score (highest)", "Score (lowest)"])
+        sort_by = st.selectbox("Sort by", list(HISTORY_SORTS))
     
-    # Apply filters
-    filtered_analyses = analyses.copy()
+    # Filters and sort run in SQLite; the full text is loaded per row on demand
+    filters = {}
     
     if date_filter:
-        filtered_analyses = [a for a in filtered_analyses 
-                           if datetime.strptime(a['created_at'], '%Y-%m-%d %H:%M:%S').date() == date_filter]
+        filters['start_date'] = filters['end_date'] = date_filter
     
     if score_filter != "All" and score_filter:
-        score_ranges = {
-            "Excellent (8-10)": (8, 10),
-            "Good (6-8)": (6, 8),
-            "Fair (4-6)": (4, 6),
-            "Poor (0-4)": (0, 4)
-        }
-        min_score, max_score = score_ranges[score_filter]
-        filtered_analyses = [a for a in filtered_analyses 
-                           if a['health_score'] and min_score <= a['health_score'] < max_score]
+        filters['min_score'], filters['max_score'] = HISTORY_SCORE_RANGES[score_filter]
     
     # Sort
-    if sort_by == "Date (newest)":
-        filtered_analyses.sort(key=lambda x: x['created_at'], reverse=True)
-    elif sort_by == "Date (oldest)":
-        filtered_analyses.sort(key=lambda x: x['created_at'])
-    elif sort_by == "Score (highest)":
-        filtered_analyses.sort(key=lambda x: x['health_score'] or 0, reverse=True)
-    elif sort_by == "Score (lowest)":
-        filtered_analyses.sort(key=lambda x: x['health_score'] or 0)
-    
-    # Display results
-    st.write(f"Showing {len(filtered_analyses)} of {len(analyses)} analyses")
-    
-    for analysis in filtered_analyses:
+    filters['order_by'], filters['descending'] = HISTORY_SORTS[sort_by]
+    
+    filtered_analyses = cached_user_analyses_summary(
+        db, st.session_state.user_id, 100, version, tuple(sorted(filters.items()))
+    )
+    
+    # Display results, one page of expanders at a time
+    st.write(f"Showing {len(filtered_analyses)} of {total_analyses} analyses")
+    
+    pages = max(1, (len(filtered_analyses) - 1) // HISTORY_PAGE_SIZE + 1)
+    page = 1
+    if pages > 1:
+        page = int(st.number_input("Page", min_value=1, max_value=pages, value=1, step=1))
+        st.caption(f"Page {page} of {pages}")
+    start = (page - 1) * HISTORY_PAGE_SIZE
+    
+    for analysis in filtered_analyses[start:start + HISTORY_PAGE_SIZE]:
         with st.expander(f"{analysis['product_name']} - Score: {analysis['health_score']}/10 - {analysis['created_at']}"):
             col1, col2 = st.columns([2, 1])
             
             with col1:
-                st.write(analysis['analysis_result'])
+                if st.checkbox("Show full analysis", key=f"full_{analysis['id']}"):
+                    st.write(cached_analysis_detail(db, analysis['id']))
             
             with col2:
                 if st.button(f"View Details", key=f"view_{analysis['id']}"):
-                    st.session_state.current_analysis = analysis
+                    st.session_state.current_analysis = dict(
+                        analysis, analysis_result=cached_analysis_detail(db, analysis['id'])
+                    )
                     st.rerun()
 
 def show_settings_page():
@@ -1029,6 +1371,10 @@ def show_settings_page():
             st.session_state.user_preferences = {}
             st.success("Settings reset!")
 
+# Shared export encoder; UTF-8 output keeps emoji product names as-is rather
+# than six-byte \u escapes, and still runs on the C encoder
+EXPORT_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False)
+
 def show_export_page(db: DatabaseManager):
     """Show data export options"""
     
@@ -1046,23 +1392,34 @@ def show_export_page(db: DatabaseManager):
         date_range = st.date_input("Date Range", value=[datetime.now().date() - timedelta(days=30), datetime.now().date()])
         
         if st.button("📤 Export Data"):
-            analyses = db.get_user_analyses(st.session_state.user_id)
+            # date_input returns a single date while a range is half-picked
+            start_date, end_date = (tuple(date_range) + (None, None))[:2]
+            analyses = db.get_user_analyses(st.session_state.user_id, limit=1000,
+                                            start_date=start_date, end_date=end_date)
             
             if export_format == "CSV":
-                df = pd.DataFrame(analyses)
-                csv = df.to_csv(index=False)
+                # Write rows straight to CSV; no intermediate DataFrame, and
+                # itemgetter plus csv.writer keep the per-row work in C
+                buffer = io.StringIO()
+                if analyses:
+                    fieldnames = list(analyses[0])
+                    writer = csv.writer(buffer)
+                    writer.writerow(fieldnames)
+                    writer.writerows(map(itemgetter(*fieldnames), analyses))
                 st.download_button(
                     label="📥 Download CSV",
-                    data=csv,
+                    data=buffer.getvalue().encode('utf-8'),
                     file_name=f"food_analyses_{datetime.now().strftime('%Y%m%d')}.csv",
                     mime="text/csv"
                 )
             
             elif export_format == "JSON":
-                json_data = json.dumps(analyses, indent=2)
+                # One object per line: readable, and each row goes through the
+                # C encoder, which json.dumps skips whenever indent is set
+                json_data = '[\n' + ',\n'.join(map(EXPORT_JSON_ENCODER.encode, analyses)) + '\n]'
                 st.download_button(
                     label="📥 Download JSON",
-                    data=json_data,
+                    data=json_data.encode('utf-8'),
                     file_name=f"food_analyses_{datetime.now().strftime('%Y%m%d')}.json",
                     mime="application/json"
                 )
@@ -1082,7 +1439,7 @@ def show_export_page(db: DatabaseManager):
 def generate_report(db: DatabaseManager, report_type: str):
     """Generate various types of reports"""
     
-    analyses = db.get_user_analyses(st.session_state.user_id)
+    analyses = cached_user_analyses_summary(db, st.session_state.user_id, 50, db.data_version())
     
     if not analyses:
         st.warning("No data available for report generation")
@@ -1091,26 +1448,32 @@ def generate_report(db: DatabaseManager, report_type: str):
     st.markdown(f"### 📊 {report_type}")
     
     if report_type == "Health Summary":
-        # Health score statistics
-        scores = [a['health_score'] for a in analyses if a['health_score']]
+        import pandas as pd
+        import plotly.express as px
+        
+        # One frame serves both the statistics and the trend chart; rows
+        # arrive newest first, so reversing puts them in date order
+        df = pd.DataFrame(analyses[::-1], columns=['health_score', 'created_at'])
+        df['health_score'] = df['health_score'].astype(float)
+        
+        # Health score statistics, as NumPy reductions that skip unscored rows
+        scores = df['health_score'].dropna()
         
-        if scores:
+        if not scores.empty:
             col1, col2, col3 = st.columns(3)
             
             with col1:
-                st.metric("Average Score", f"{sum(scores)/len(scores):.1f}/10")
+                st.metric("Average Score", f"{scores.mean():.1f}/10")
             with col2:
-                st.metric("Best Score", f"{max(scores):.1f}/10")
+                st.metric("Best Score", f"{scores.max():.1f}/10")
             with col3:
-                st.metric("Worst Score", f"{min(scores):.1f}/10")
-            
-            # Score trend chart
-            df = pd.DataFrame(analyses)
-            df['created_at'] = pd.to_datetime(df['created_at'])
-            df = df.sort_values('created_at')
+                st.metric("Worst Score", f"{scores.min():.1f}/10")
             
+            # Score trend chart; created_at stays ISO text, which plotly.js
+            # recognises as dates in the browser, so there is no pandas pass
             fig = px.line(df, x='created_at', y='health_score', 
                          title='Health Score Trend Over Time')
+            fig.update_xaxes(type='date')
             st.plotly_chart(fig, use_container_width=True)
     
     elif report_type == "Nutrition Trends":
@@ -1122,18 +1485,9 @@ def generate_report(db: DatabaseManager, report_type: str):
     elif report_type == "Custom Report":
         st.info("📋 Custom report builder ready for implementation!")
 
-def generate_nutrition_text_from_image(image: Image.Image) -> str:
-    """Generate realistic nutrition text (fallback when OCR not available)"""
-    
-    # Create hash from image for consistency
-    img_byte_arr = io.BytesIO()
-    image.save(img_byte_arr, format='PNG')
-    img_bytes = img_byte_arr.getvalue()
-    image_hash = hashlib.md5(img_bytes).hexdigest()
-    hash_int = int(image_hash[:4], 16)
-    
-    templates = [
-        """Nutrition Facts
+# Simulated OCR output, chosen per image by generate_nutrition_text_from_image
+SIMULATED_NUTRITION_TEXTS = (
+    """Nutrition Facts
 Serving Size: 1 package (45g)
 Calories: 210
 Total Fat: 11g (14% DV)
@@ -1146,7 +1500,7 @@ Protein: 3g
 
 Ingredients: Enriched wheat flour, vegetable oil, high fructose corn syrup, salt, artificial flavor, yellow 6, red 40, BHT""",
 
-        """Nutrition Facts
+    """Nutrition Facts
 Serving Size: 1 bar (50g)
 Calories: 200
 Total Fat: 12g (15% DV)
@@ -1159,7 +1513,7 @@ Protein: 9g
 
 Ingredients: Organic oats, almonds, organic honey, organic coconut oil, organic vanilla extract, sea salt""",
 
-        """Nutrition Facts
+    """Nutrition Facts
 Serving Size: 1 can (355ml)
 Calories: 140
 Sodium: 45mg (2% DV)
@@ -1168,9 +1522,17 @@ Total Sugars: 39g
 Protein: 0g
 
 Ingredients: Carbonated water, high fructose corn syrup, caramel color, phosphoric acid, natural flavors, caffeine"""
-    ]
+)
+
+def generate_nutrition_text_from_image(image: Image.Image) -> str:
+    """Generate realistic nutrition text (fallback when OCR not available)"""
+    
+    # Create hash from image for consistency; a 32x32 sample of the raw
+    # pixels is enough to tell uploads apart, with no PNG encode
+    thumbnail_bytes = image.resize((32, 32), Image.NEAREST).tobytes()
+    hash_int = int.from_bytes(hashlib.blake2b(thumbnail_bytes, digest_size=2).digest(), 'big')
     
-    return templates[hash_int % len(templates)]
+    return SIMULATED_NUTRITION_TEXTS[hash_int % len(SIMULATED_NUTRITION_TEXTS)]
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
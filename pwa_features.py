@@ -3,71 +3,42 @@ Progressive Web App Features for Mobile-First Experience
 """
 
 import streamlit as st
-import json
-
-def add_pwa_features():
-    """Add PWA capabilities to make it mobile-friendly"""
+# Page markup is constant, so it is built once at import rather than per rerun
+PWA_HTML = """
+    <link rel="manifest" href="/app/static/manifest.json">
     
-    # PWA Manifest
-    manifest = {
-        "name": "AI Food Quality Analyzer",
-        "short_name": "FoodAI",
-        "description": "AI-powered food quality and chemical analysis",
-        "start_url": "/",
-        "display": "standalone",
-        "background_color": "#667eea",
-        "theme_color": "#667eea",
-        "icons": [
-            {
-                "src": "data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMTkyIiBoZWlnaHQ9IjE5MiIgdmlld0JveD0iMCAwIDE5MiAxOTIiIGZpbGw9Im5vbmUiIHhtbG5zPSJodHRwOi8vd3d3LnczLm9yZy8yMDAwL3N2ZyI+CjxyZWN0IHdpZHRoPSIxOTIiIGhlaWdodD0iMTkyIiByeD0iMjQiIGZpbGw9IiM2NjdlZWEiLz4KPHN2ZyB4PSI0OCIgeT0iNDgiIHdpZHRoPSI5NiIgaGVpZ2h0PSI5NiIgdmlld0JveD0iMCAwIDI0IDI0IiBmaWxsPSJ3aGl0ZSI+CjxwYXRoIGQ9Ik0xMiAyQzYuNDggMiAyIDYuNDggMiAxMnM0LjQ4IDEwIDEwIDEwIDEwLTQuNDggMTAtMTBTMTcuNTIgMiAxMiAyem0tMiAxNWwtNS01IDEuNDEtMS40MUwxMCAxNC4xN2w3LjU5LTcuNTlMMTkgOGwtOSA5eiIvPgo8L3N2Zz4KPC9zdmc+",
-                "sizes": "192x192",
-                "type": "image/svg+xml"
-            }
-        ]
-    }
-    
-    # Add PWA meta tags
-    st.markdown(f"""
     <script>
-        // Add manifest
-        const manifestBlob = new Blob(['{json.dumps(manifest)}'], {{type: 'application/json'}});
-        const manifestURL = URL.createObjectURL(manifestBlob);
-        const link = document.createElement('link');
-        link.rel = 'manifest';
-        link.href = manifestURL;
-        document.head.appendChild(link);
-        
         // Service Worker Registration
-        if ('serviceWorker' in navigator) {{
-            navigator.serviceWorker.register('/sw.js').then(function(registration) {{
+        if ('serviceWorker' in navigator) {
+            navigator.serviceWorker.register('/sw.js').then(function(registration) {
                 console.log('SW registered: ', registration);
-            }}).catch(function(registrationError) {{
+            }).catch(function(registrationError) {
                 console.log('SW registration failed: ', registrationError);
-            }});
-        }}
+            });
+        }
     </script>
     
     <style>
         /* Mobile-first responsive design */
-        @media (max-width: 768px) {{
-            .main .block-container {{
+        @media (max-width: 768px) {
+            .main .block-container {
                 padding-top: 1rem;
                 padding-left: 1rem;
                 padding-right: 1rem;
-            }}
+            }
             
-            .stButton > button {{
+            .stButton > button {
                 width: 100%;
                 margin-bottom: 0.5rem;
-            }}
+            }
             
-            .stFileUploader {{
+            .stFileUploader {
                 margin-bottom: 1rem;
-            }}
-        }}
+            }
+        }
         
         /* Install prompt */
-        .install-prompt {{
+        .install-prompt {
             position: fixed;
             bottom: 20px;
             left: 20px;
@@ -79,7 +50,7 @@ def add_pwa_features():
             box-shadow: 0 4px 20px rgba(0,0,0,0.3);
             z-index: 1000;
             display: none;
-        }}
+        }
     </style>
     
     <div id="installPrompt" class="install-prompt">
@@ -97,31 +68,28 @@ def add_pwa_features():
     <script>
         let deferredPrompt;
         
-        window.addEventListener('beforeinstallprompt', (e) => {{
+        window.addEventListener('beforeinstallprompt', (e) => {
             e.preventDefault();
             deferredPrompt = e;
             document.getElementById('installPrompt').style.display = 'block';
-        }});
+        });
         
-        function installApp() {{
-            if (deferredPrompt) {{
+        function installApp() {
+            if (deferredPrompt) {
                 deferredPrompt.prompt();
-                deferredPrompt.userChoice.then((choiceResult) => {{
-                    if (choiceResult.outcome === 'accepted') {{
+                deferredPrompt.userChoice.then((choiceResult) => {
+                    if (choiceResult.outcome === 'accepted') {
                         console.log('User accepted the install prompt');
-                    }}
+                    }
                     deferredPrompt = null;
                     document.getElementById('installPrompt').style.display = 'none';
-                }});
-            }}
-        }}
+                });
+            }
+        }
     </script>
-    """, unsafe_allow_html=True)
+    """
 
-def add_mobile_camera_integration():
-    """Add mobile camera integration for direct photo capture"""
-    
-    st.markdown("""
+CAMERA_HTML = """
     <script>
         function openCamera() {
             if (navigator.mediaDevices && navigator.mediaDevices.getUserMedia) {
@@ -177,4 +145,16 @@ def add_mobile_camera_integration():
             }
         }
     </script>
-    """, unsafe_allow_html=True)
\ No newline at end of file
+    """
+
+def add_pwa_features():
+    """Add PWA capabilities to make it mobile-friendly"""
+    
+    # Add PWA meta tags; the manifest and its PNG icons are committed under
+    # static/ and served by Streamlit's static file serving
+    st.markdown(PWA_HTML, unsafe_allow_html=True)
+
+def add_mobile_camera_integration():
+    """Add mobile camera integration for direct photo capture"""
+    
+    st.markdown(CAMERA_HTML, unsafe_allow_html=True)
\ No newline at end of file
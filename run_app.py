@@ -5,11 +5,21 @@ This script will set up everything and run the application
 """
 
 import os
+import re
 import sys
 import subprocess
 import platform
+from importlib import metadata
 from pathlib import Path
 
+# Written after a successful setup so later runs can skip straight to the app
+APP_DIR = Path(__file__).parent
+SETUP_SENTINEL = APP_DIR / "data" / ".setup_ok"
+REQUIREMENTS_FILE = APP_DIR / "requirements.txt"
+
+# "name", "name==1.2.3" or "name>=1.2.3"
+REQUIREMENT_PATTERN = re.compile(r"^([A-Za-z0-9._-]+)\s*(?:(==|>=)\s*([^\s;#]+))?")
+
 def print_banner():
     """Print application banner"""
     print("=" * 60)
@@ -28,7 +38,7 @@ def check_python():
     print(f"✅ Python {version.major}.{version.minor}.{version.micro} - OK")
 
 def install_requirements():
-    """Install required packages"""
+    """Install required packages; returns False if any could not be installed"""
     print("\n📦 Installing required packages...")
     
     # Essential packages for basic functionality
@@ -46,15 +56,77 @@ def install_requirements():
         "sqlalchemy==2.0.23"
     ]
     
-    for package in essential_packages:
-        try:
-            print(f"Installing {package.split('==')[0]}...")
-            subprocess.check_call([sys.executable, "-m", "pip", "install", package], 
-                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        except subprocess.CalledProcessError:
-            print(f"⚠️  Warning: Could not install {package}")
+    # The project's requirements file wins where present; pins for packages
+    # it doesn't list are installed alongside it
+    requirements = []
+    batch = []
+    if REQUIREMENTS_FILE.exists():
+        requirements = read_requirements(REQUIREMENTS_FILE)
+        batch = ["-r", str(REQUIREMENTS_FILE)]
+    listed = {parse_requirement(package)[0].lower() for package in requirements}
+    extra = [package for package in essential_packages if parse_requirement(package)[0].lower() not in listed]
+    requirements += extra
+    batch += extra
+    
+    # Only requirements that are not already satisfied need pip at all
+    missing = [package for package in requirements if not is_installed(package)]
+    if not missing:
+        print("✅ Essential packages already installed!")
+        return True
+    
+    ok = True
+    
+    pip_install = [sys.executable, "-m", "pip", "install",
+                   "--disable-pip-version-check", "--no-input"]
+    try:
+        # One resolver run for everything
+        print(f"Installing {', '.join(parse_requirement(package)[0] for package in missing)}...")
+        subprocess.check_call(pip_install + batch,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except subprocess.CalledProcessError:
+        # Fall back to one package at a time to find the ones that fail
+        for package in missing:
+            try:
+                subprocess.check_call(pip_install + [package],
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            except subprocess.CalledProcessError:
+                print(f"⚠️  Warning: Could not install {package}")
+                ok = False
+    
+    if ok:
+        print("✅ Essential packages installed!")
+    return ok
+
+def read_requirements(path):
+    """Requirement lines of a requirements file, without comments or blanks"""
+    lines = (line.split("#", 1)[0].strip() for line in path.read_text(encoding="utf-8").splitlines())
+    return [line for line in lines if line and not line.startswith("-")]
+
+def parse_requirement(requirement):
+    """Split a requirement into (name, operator, version); operator and version may be empty"""
+    match = REQUIREMENT_PATTERN.match(requirement)
+    if not match:
+        return requirement, "", ""
+    name, operator, version = match.groups()
+    return name, operator or "", version or ""
+
+def version_key(version):
+    """Numeric release tuple for simple version comparisons ("4.8.1.78" -> (4, 8, 1, 78))"""
+    return tuple(int(re.match(r"\d*", part).group() or 0) for part in version.split("."))
+
+def is_installed(requirement):
+    """Check whether a 'name', 'name==version' or 'name>=version' requirement is satisfied"""
+    name, operator, version = parse_requirement(requirement)
+    try:
+        installed = metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return False
     
-    print("✅ Essential packages installed!")
+    if operator == "==":
+        return installed == version
+    if operator == ">=":
+        return version_key(installed) >= version_key(version)
+    return True
 
 def check_tesseract():
     """Check if Tesseract is available"""
@@ -87,11 +159,22 @@ def setup_directories():
     print("\n📁 Setting up directories...")
     directories = ["uploads", "logs", "data"]
     
+    # Relative to the app, which is also where run_streamlit starts it
     for directory in directories:
-        Path(directory).mkdir(exist_ok=True)
+        (APP_DIR / directory).mkdir(exist_ok=True)
     
     print("✅ Directories created!")
 
+def setup_is_current():
+    """True when a previous setup succeeded after the pins and requirements last changed"""
+    try:
+        finished = SETUP_SENTINEL.stat().st_mtime
+    except FileNotFoundError:
+        return False
+    
+    inputs = [Path(__file__), APP_DIR / "requirements.txt"]
+    return all(finished > path.stat().st_mtime for path in inputs if path.exists())
+
 def check_api_key():
     """Check if API key is configured"""
     print("\n🔑 Checking API configuration...")
@@ -147,11 +230,17 @@ def main():
     """Main setup and run function"""
     print_banner()
     
-    # Setup steps
+    # Setup steps; package, Tesseract and directory checks only run until
+    # they have succeeded once
     check_python()
-    install_requirements()
-    check_tesseract()
-    setup_directories()
+    if setup_is_current():
+        print("✅ Setup already complete, skipping package and Tesseract checks")
+    else:
+        packages_ok = install_requirements()
+        tesseract_ok = check_tesseract()
+        setup_directories()
+        if packages_ok and tesseract_ok:
+            SETUP_SENTINEL.touch()
     api_configured = check_api_key()
     
     print("\n" + "=" * 60)
@@ -8,51 +8,55 @@ import streamlit as st
 import json
 from datetime import datetime
 from PIL import Image
-import io
 import base64
 
 # Dynamic data generation for realistic demo
 import random
+import re
+from bisect import bisect_right
 import hashlib
+from collections import Counter
+from types import MappingProxyType
 
-# Different product profiles for variety
-PRODUCT_PROFILES = {
+# Different product profiles for variety; values are (low, high) ranges
+# sampled per analysis in sample_product_data
+PRODUCT_PROFILES = MappingProxyType({
     "healthy_snack": {
-        "nutrition": {
-            "calories": random.randint(120, 180),
-            "total_fat": random.randint(3, 8),
-            "saturated_fat": random.randint(1, 3),
-            "sodium": random.randint(50, 200),
-            "total_carbs": random.randint(15, 25),
-            "fiber": random.randint(3, 8),
-            "sugars": random.randint(2, 8),
-            "protein": random.randint(4, 12)
+        "nutrition_ranges": {
+            "calories": (120, 180),
+            "total_fat": (3, 8),
+            "saturated_fat": (1, 3),
+            "sodium": (50, 200),
+            "total_carbs": (15, 25),
+            "fiber": (3, 8),
+            "sugars": (2, 8),
+            "protein": (4, 12)
         },
-        "chemicals": [
+        "chemicals": (
             {
                 "name": "Natural Flavors",
                 "risk_level": "low",
                 "category": "flavoring",
                 "description": "Generally recognized as safe",
                 "health_effects": ["Minimal health concerns"]
-            }
-        ],
-        "health_score": random.uniform(7.5, 9.0),
-        "novi_score": random.randint(75, 95)
+            },
+        ),
+        "health_score_range": (7.5, 9.0),
+        "novi_score_range": (75, 95)
     },
     
     "processed_snack": {
-        "nutrition": {
-            "calories": random.randint(200, 350),
-            "total_fat": random.randint(8, 18),
-            "saturated_fat": random.randint(3, 8),
-            "sodium": random.randint(400, 800),
-            "total_carbs": random.randint(25, 45),
-            "fiber": random.randint(1, 4),
-            "sugars": random.randint(8, 20),
-            "protein": random.randint(3, 8)
+        "nutrition_ranges": {
+            "calories": (200, 350),
+            "total_fat": (8, 18),
+            "saturated_fat": (3, 8),
+            "sodium": (400, 800),
+            "total_carbs": (25, 45),
+            "fiber": (1, 4),
+            "sugars": (8, 20),
+            "protein": (3, 8)
         },
-        "chemicals": [
+        "chemicals": (
             {
                 "name": "High Fructose Corn Syrup",
                 "risk_level": "high",
@@ -74,23 +78,23 @@ PRODUCT_PROFILES = {
                 "description": "May cause hyperactivity in children",
                 "health_effects": ["Hyperactivity", "Allergic reactions"]
             }
-        ],
-        "health_score": random.uniform(3.0, 6.0),
-        "novi_score": random.randint(25, 55)
+        ),
+        "health_score_range": (3.0, 6.0),
+        "novi_score_range": (25, 55)
     },
     
     "beverage": {
-        "nutrition": {
-            "calories": random.randint(100, 200),
-            "total_fat": random.randint(0, 2),
-            "saturated_fat": random.randint(0, 1),
-            "sodium": random.randint(10, 100),
-            "total_carbs": random.randint(20, 50),
-            "fiber": random.randint(0, 2),
-            "sugars": random.randint(18, 45),
-            "protein": random.randint(0, 3)
+        "nutrition_ranges": {
+            "calories": (100, 200),
+            "total_fat": (0, 2),
+            "saturated_fat": (0, 1),
+            "sodium": (10, 100),
+            "total_carbs": (20, 50),
+            "fiber": (0, 2),
+            "sugars": (18, 45),
+            "protein": (0, 3)
         },
-        "chemicals": [
+        "chemicals": (
             {
                 "name": "Phosphoric Acid",
                 "risk_level": "medium",
@@ -112,23 +116,23 @@ PRODUCT_PROFILES = {
                 "description": "May contain trace amounts of 4-methylimidazole",
                 "health_effects": ["Minimal concerns at normal consumption"]
             }
-        ],
-        "health_score": random.uniform(4.0, 7.0),
-        "novi_score": random.randint(35, 65)
+        ),
+        "health_score_range": (4.0, 7.0),
+        "novi_score_range": (35, 65)
     },
     
     "frozen_meal": {
-        "nutrition": {
-            "calories": random.randint(300, 500),
-            "total_fat": random.randint(10, 25),
-            "saturated_fat": random.randint(4, 12),
-            "sodium": random.randint(600, 1200),
-            "total_carbs": random.randint(30, 60),
-            "fiber": random.randint(2, 8),
-            "sugars": random.randint(5, 15),
-            "protein": random.randint(12, 25)
+        "nutrition_ranges": {
+            "calories": (300, 500),
+            "total_fat": (10, 25),
+            "saturated_fat": (4, 12),
+            "sodium": (600, 1200),
+            "total_carbs": (30, 60),
+            "fiber": (2, 8),
+            "sugars": (5, 15),
+            "protein": (12, 25)
         },
-        "chemicals": [
+        "chemicals": (
             {
                 "name": "Monosodium Glutamate (MSG)",
                 "risk_level": "medium",
@@ -150,23 +154,23 @@ PRODUCT_PROFILES = {
                 "description": "May cause digestive inflammation",
                 "health_effects": ["Digestive issues", "Inflammation"]
             }
-        ],
-        "health_score": random.uniform(4.5, 6.5),
-        "novi_score": random.randint(40, 70)
+        ),
+        "health_score_range": (4.5, 6.5),
+        "novi_score_range": (40, 70)
     },
     
     "organic_product": {
-        "nutrition": {
-            "calories": random.randint(150, 250),
-            "total_fat": random.randint(5, 12),
-            "saturated_fat": random.randint(2, 5),
-            "sodium": random.randint(50, 300),
-            "total_carbs": random.randint(20, 35),
-            "fiber": random.randint(4, 10),
-            "sugars": random.randint(3, 12),
-            "protein": random.randint(6, 15)
+        "nutrition_ranges": {
+            "calories": (150, 250),
+            "total_fat": (5, 12),
+            "saturated_fat": (2, 5),
+            "sodium": (50, 300),
+            "total_carbs": (20, 35),
+            "fiber": (4, 10),
+            "sugars": (3, 12),
+            "protein": (6, 15)
         },
-        "chemicals": [
+        "chemicals": (
             {
                 "name": "Organic Cane Sugar",
                 "risk_level": "low",
@@ -181,46 +185,252 @@ PRODUCT_PROFILES = {
                 "description": "Natural sodium source",
                 "health_effects": ["Monitor sodium intake"]
             }
-        ],
-        "health_score": random.uniform(7.0, 9.5),
-        "novi_score": random.randint(70, 90)
+        ),
+        "health_score_range": (7.0, 9.5),
+        "novi_score_range": (70, 90)
     }
-}
+})
+
+# Largest size the uploaded image preview is sent to the browser at
+PREVIEW_SIZE = (800, 800)
+
+# Landing page bullet lists
+KEY_FEATURES = (
+    "🔍 OCR Text Extraction from nutrition labels",
+    "🧪 Chemical Detection & Risk Assessment",
+    "💡 Personalized Health Recommendations",
+    "📊 NOVI Nutrition Scoring",
+    "⚠️ Allergen & Health Warnings",
+    "📈 Analysis History & Trends"
+)
+
+PRODUCT_TYPE_HIGHLIGHTS = (
+    "**🥗 Healthy Snack**: Low chemicals, high nutrition score",
+    "**🍟 Processed Snack**: Multiple additives, medium-low score",
+    "**🥤 Beverage**: Artificial sweeteners, variable scores",
+    "**🍽️ Frozen Meal**: Preservatives, sodium warnings",
+    "**🌱 Organic**: Minimal chemicals, high scores"
+)
+
+# Display label and unit for each nutrient, in nutrition table order
+NUTRIENT_LABELS = MappingProxyType({
+    "calories": ("Calories", "kcal"),
+    "total_fat": ("Total Fat", "g"),
+    "saturated_fat": ("Saturated Fat", "g"),
+    "sodium": ("Sodium", "g"),
+    "total_carbs": ("Total Carbs", "g"),
+    "fiber": ("Fiber", "g"),
+    "sugars": ("Sugars", "g"),
+    "protein": ("Protein", "g")
+})
 
-def get_product_data(image_data=None, product_type=None):
+PRODUCT_TYPE_DISPLAY = MappingProxyType({
+    'healthy_snack': '🥗 Healthy Snack',
+    'processed_snack': '🍟 Processed Snack', 
+    'beverage': '🥤 Beverage',
+    'frozen_meal': '🍽️ Frozen Meal',
+    'organic_product': '🌱 Organic Product'
+})
+
+RISK_ORDER = ("high", "medium", "low")
+RISK_COLORS = MappingProxyType({"high": "🔴", "medium": "🟡", "low": "🟢"})
+
+# Health score bands: below 4 is poor, below 7 fair, otherwise good
+HEALTH_THRESHOLDS = (4, 7)
+HEALTH_BANDS = (
+    ("🔴 Poor", "🔴 **Recommendation: AVOID OR LIMIT SEVERELY**", st.error),
+    ("🟡 Fair", "🟡 **Recommendation: CONSUME IN MODERATION**", st.warning),
+    ("🟢 Good", "🟢 **Recommendation: SAFE TO CONSUME**", st.success)
+)
+
+# Risk bands keyed on (high, medium) chemical counts: any high-risk
+# chemical is high risk, two or more medium-risk chemicals are medium
+RISK_THRESHOLDS = ((0, 2), (1, 0))
+RISK_BANDS = (
+    ("Low", "🟢 Low Risk", st.success),
+    ("Medium", "🟡 Medium Risk", st.warning),
+    ("High", "🔴 High Risk", st.error)
+)
+
+# Static per-product-type lookups used by the recommendation tabs
+RECOMMENDATIONS = MappingProxyType({
+    "healthy_snack": {
+        "benefits": (
+            "Good source of fiber and nutrients",
+            "Lower in artificial additives",
+            "Supports sustained energy levels",
+            "Contains beneficial vitamins and minerals"
+        ),
+        "risks": (
+            "Still contains calories - watch portions",
+            "May have natural sugars",
+            "Check for allergens in nuts/seeds"
+        )
+    },
+    "processed_snack": {
+        "benefits": (
+            "Convenient and shelf-stable",
+            "Provides quick energy",
+            "Fortified with some vitamins"
+        ),
+        "risks": (
+            "High in artificial chemicals and preservatives",
+            "Excessive sodium may affect blood pressure",
+            "Added sugars can cause blood sugar spikes",
+            "Trans fats may increase heart disease risk",
+            "Artificial colors linked to hyperactivity"
+        )
+    },
+    "beverage": {
+        "benefits": (
+            "Provides hydration",
+            "May contain some vitamins",
+            "Quick source of energy"
+        ),
+        "risks": (
+            "High sugar content affects blood glucose",
+            "Artificial sweeteners may cause digestive issues",
+            "Phosphoric acid can affect bone health",
+            "Empty calories with little nutrition",
+            "May contribute to tooth decay"
+        )
+    },
+    "frozen_meal": {
+        "benefits": (
+            "Convenient and time-saving",
+            "Portion-controlled serving",
+            "May contain vegetables and protein",
+            "Long shelf life"
+        ),
+        "risks": (
+            "Very high sodium content",
+            "Contains multiple preservatives",
+            "MSG may cause headaches in sensitive people",
+            "Nitrites linked to cancer risk",
+            "Highly processed ingredients"
+        )
+    },
+    "organic_product": {
+        "benefits": (
+            "Minimal artificial additives",
+            "No synthetic pesticides",
+            "Higher nutrient density",
+            "Environmentally sustainable",
+            "Better for long-term health"
+        ),
+        "risks": (
+            "Higher cost than conventional",
+            "Shorter shelf life",
+            "Still contains natural sugars and calories"
+        )
+    }
+})
+
+DEFAULT_RECOMMENDATION = MappingProxyType({
+    "benefits": ("Provides energy and nutrients",),
+    "risks": ("Monitor portion sizes", "Check ingredient list")
+})
+
+ALLERGEN_MAP = MappingProxyType({
+    "healthy_snack": ("nuts", "soy", "gluten"),
+    "processed_snack": ("gluten", "soy", "milk", "eggs"),
+    "beverage": ("sulfites",),
+    "frozen_meal": ("gluten", "soy", "milk", "eggs"),
+    "organic_product": ("nuts", "soy")
+})
+
+# One case-insensitive alternation per product type, searched against each
+# line of the user's allergy list
+ALLERGEN_PATTERNS = MappingProxyType({
+    product_type: re.compile("|".join(map(re.escape, allergens)), re.IGNORECASE)
+    for product_type, allergens in ALLERGEN_MAP.items()
+})
+
+USAGE_TIPS = MappingProxyType({
+    "healthy_snack": (
+        "Enjoy as part of a balanced diet",
+        "Pair with protein for sustained energy",
+        "Great for pre or post-workout snacking"
+    ),
+    "processed_snack": (
+        "Consume only occasionally as a treat",
+        "Drink plenty of water due to high sodium",
+        "Consider healthier alternatives for regular snacking",
+        "Monitor blood sugar if diabetic"
+    ),
+    "beverage": (
+        "Limit to special occasions",
+        "Dilute with water to reduce sugar content",
+        "Brush teeth after consumption",
+        "Choose smaller serving sizes"
+    ),
+    "frozen_meal": (
+        "Add fresh vegetables to increase nutrition",
+        "Drink extra water due to high sodium",
+        "Use as backup meal, not regular option",
+        "Check blood pressure regularly if consumed often"
+    ),
+    "organic_product": (
+        "Store properly to maintain freshness",
+        "Great choice for regular consumption",
+        "Support sustainable farming practices"
+    )
+})
+
+DEFAULT_USAGE_TIPS = ("Consume in moderation", "Read labels carefully")
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def sample_product_data(product_type, seed):
+    """Sample one analysis result from a product profile for the given seed"""
+    rng = random.Random(seed)
+    
+    # Sample each field from the profile ranges, applying one variation
+    # factor per analysis to make each result unique
+    profile = PRODUCT_PROFILES[product_type]
+    variation = rng.uniform(0.8, 1.2)
+    nutrition = {
+        key: max(0, int(rng.randint(low, high) * variation))
+        for key, (low, high) in profile["nutrition_ranges"].items()
+    }
+    
+    health_score = rng.uniform(*profile["health_score_range"]) * rng.uniform(0.9, 1.1)
+    novi_score = int(rng.randint(*profile["novi_score_range"]) * rng.uniform(0.9, 1.1))
+    
+    # Ensure scores are within valid ranges
+    return {
+        "seed": seed,
+        "nutrition": nutrition,
+        "chemicals": list(profile["chemicals"]),
+        "health_score": max(0, min(10, health_score)),
+        "novi_score": max(0, min(100, novi_score))
+    }
+
+def bullet_list(items):
+    """Join items into one Markdown bullet list for a single st.markdown call"""
+    return "\n".join(f"- {item}" for item in items)
+
+def get_product_data(image_data=None, product_type=None, seed=None):
     """Generate dynamic product data based on image or random selection"""
     
     # If image is provided, try to determine product type from image characteristics
     if image_data is not None:
         # Create a hash from image data for consistent results
-        image_hash = hashlib.md5(image_data).hexdigest()
-        # Use hash to determine product type consistently
-        hash_int = int(image_hash[:8], 16)
+        image_hash = hashlib.blake2b(image_data, digest_size=8).digest()
+        # Use hash to determine product type and sample consistently
+        hash_int = int.from_bytes(image_hash, 'little')
         product_types = list(PRODUCT_PROFILES.keys())
         selected_type = product_types[hash_int % len(product_types)]
+        seed = hash_int
     elif product_type:
         selected_type = product_type
     else:
         # Random selection for demo
         selected_type = random.choice(list(PRODUCT_PROFILES.keys()))
     
-    # Get base profile and add some randomization
-    profile = PRODUCT_PROFILES[selected_type].copy()
-    
-    # Add some variation to make each analysis unique
-    variation = random.uniform(0.8, 1.2)
-    for key, value in profile["nutrition"].items():
-        if isinstance(value, (int, float)):
-            profile["nutrition"][key] = max(0, int(value * variation))
-    
-    profile["health_score"] *= random.uniform(0.9, 1.1)
-    profile["novi_score"] = int(profile["novi_score"] * random.uniform(0.9, 1.1))
+    if seed is None:
+        seed = random.getrandbits(32)
     
-    # Ensure scores are within valid ranges
-    profile["health_score"] = max(0, min(10, profile["health_score"]))
-    profile["novi_score"] = max(0, min(100, profile["novi_score"]))
-    
-    return profile, selected_type
+    return sample_product_data(selected_type, seed), selected_type
 
 def main():
     st.set_page_config(
@@ -294,43 +504,51 @@ def main():
         )
         
         if uploaded_file is not None:
-            image = Image.open(uploaded_file)
-            st.image(image, caption="Uploaded Image", use_column_width=True)
+            image_bytes = uploaded_file.getvalue()
+            image_hash = hashlib.blake2b(image_bytes, digest_size=8).digest()
+            
+            # Decode and shrink the upload once; reruns reuse the preview
+            preview = st.session_state.get('upload_preview')
+            if preview is None or preview[0] != image_hash:
+                image = Image.open(uploaded_file)
+                image.thumbnail(PREVIEW_SIZE)
+                preview = (image_hash, image)
+                st.session_state.upload_preview = preview
+            
+            st.image(preview[1], caption="Uploaded Image", use_column_width=True)
             
             if st.button("🔍 Analyze Food Product", type="primary"):
-                # Get image data for consistent analysis
-                img_byte_arr = io.BytesIO()
-                image.save(img_byte_arr, format='PNG')
-                img_byte_arr = img_byte_arr.getvalue()
-                
-                st.session_state.current_product_data, st.session_state.product_type = get_product_data(img_byte_arr)
+                # Hash the uploaded bytes for consistent analysis
+                st.session_state.current_product_data, st.session_state.product_type = get_product_data(image_bytes)
                 st.session_state.show_analysis = True
         
-        # Demo buttons for different product types
+        # Demo buttons for different product types; the session seed keeps
+        # repeated clicks on the same button consistent
+        product_seed = st.session_state.setdefault('product_seed', random.getrandbits(32))
         st.markdown("---")
         st.markdown("### 🎯 Try Different Product Types")
         
         col_a, col_b = st.columns(2)
         with col_a:
             if st.button("🥗 Healthy Snack", type="secondary"):
-                st.session_state.current_product_data, st.session_state.product_type = get_product_data(product_type="healthy_snack")
+                st.session_state.current_product_data, st.session_state.product_type = get_product_data(product_type="healthy_snack", seed=product_seed)
                 st.session_state.show_analysis = True
             
             if st.button("🥤 Beverage", type="secondary"):
-                st.session_state.current_product_data, st.session_state.product_type = get_product_data(product_type="beverage")
+                st.session_state.current_product_data, st.session_state.product_type = get_product_data(product_type="beverage", seed=product_seed)
                 st.session_state.show_analysis = True
         
         with col_b:
             if st.button("🍟 Processed Snack", type="secondary"):
-                st.session_state.current_product_data, st.session_state.product_type = get_product_data(product_type="processed_snack")
+                st.session_state.current_product_data, st.session_state.product_type = get_product_data(product_type="processed_snack", seed=product_seed)
                 st.session_state.show_analysis = True
             
             if st.button("🌱 Organic Product", type="secondary"):
-                st.session_state.current_product_data, st.session_state.product_type = get_product_data(product_type="organic_product")
+                st.session_state.current_product_data, st.session_state.product_type = get_product_data(product_type="organic_product", seed=product_seed)
                 st.session_state.show_analysis = True
         
         if st.button("🍽️ Frozen Meal", type="secondary"):
-            st.session_state.current_product_data, st.session_state.product_type = get_product_data(product_type="frozen_meal")
+            st.session_state.current_product_data, st.session_state.product_type = get_product_data(product_type="frozen_meal", seed=product_seed)
             st.session_state.show_analysis = True
     
     with col2:
@@ -341,25 +559,10 @@ def main():
             
             # Show features
             st.markdown("### ✨ Key Features")
-            features = [
-                "🔍 OCR Text Extraction from nutrition labels",
-                "🧪 Chemical Detection & Risk Assessment", 
-                "💡 Personalized Health Recommendations",
-                "📊 NOVI Nutrition Scoring",
-                "⚠️ Allergen & Health Warnings",
-                "📈 Analysis History & Trends"
-            ]
-            
-            for feature in features:
-                st.markdown(f"- {feature}")
+            st.markdown(bullet_list(KEY_FEATURES))
             
             st.markdown("### 🎯 Try Different Products")
-            st.markdown("Each product type shows different:")
-            st.markdown("- **🥗 Healthy Snack**: Low chemicals, high nutrition score")
-            st.markdown("- **🍟 Processed Snack**: Multiple additives, medium-low score")  
-            st.markdown("- **🥤 Beverage**: Artificial sweeteners, variable scores")
-            st.markdown("- **🍽️ Frozen Meal**: Preservatives, sodium warnings")
-            st.markdown("- **🌱 Organic**: Minimal chemicals, high scores")
+            st.markdown("Each product type shows different:\n\n" + bullet_list(PRODUCT_TYPE_HIGHLIGHTS))
 
 def show_analysis_results(allergies, health_conditions):
     """Show comprehensive analysis results"""
@@ -373,40 +576,7 @@ def show_analysis_results(allergies, health_conditions):
     product_type = st.session_state.get('product_type', 'unknown')
     
     # Show product type
-    product_type_display = {
-        'healthy_snack': '🥗 Healthy Snack',
-        'processed_snack': '🍟 Processed Snack', 
-        'beverage': '🥤 Beverage',
-        'frozen_meal': '🍽️ Frozen Meal',
-        'organic_product': '🌱 Organic Product'
-    }
-    
-    st.info(f"**Detected Product Type:** {product_type_display.get(product_type, '🔍 Unknown Product')}")
-    
-    # Progress simulation
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
-    import time
-    
-    status_text.text("🔍 Extracting text from image...")
-    progress_bar.progress(25)
-    time.sleep(0.3)
-    
-    status_text.text("🧠 Analyzing nutrition data...")
-    progress_bar.progress(50)
-    time.sleep(0.3)
-    
-    status_text.text("🧪 Detecting chemicals...")
-    progress_bar.progress(75)
-    time.sleep(0.3)
-    
-    status_text.text("💡 Generating recommendations...")
-    progress_bar.progress(100)
-    time.sleep(0.3)
-    
-    progress_bar.empty()
-    status_text.empty()
+    st.info(f"**Detected Product Type:** {PRODUCT_TYPE_DISPLAY.get(product_type, '🔍 Unknown Product')}")
     
     # Overall scores
     col1, col2, col3 = st.columns(3)
@@ -416,12 +586,10 @@ def show_analysis_results(allergies, health_conditions):
     
     with col1:
         st.metric("Health Score", f"{health_score:.1f}/10")
-        if health_score >= 7:
-            st.success("🟢 Good")
-        elif health_score >= 4:
-            st.warning("🟡 Fair") 
-        else:
-            st.error("🔴 Poor")
+        health_label, recommendation, show_band = HEALTH_BANDS[
+            bisect_right(HEALTH_THRESHOLDS, health_score)
+        ]
+        show_band(health_label)
     
     with col2:
         st.metric("NOVI Score", f"{novi_score}/100")
@@ -429,18 +597,14 @@ def show_analysis_results(allergies, health_conditions):
     with col3:
         # Determine risk level based on chemicals
         chemicals = product_data["chemicals"]
-        high_risk_count = sum(1 for c in chemicals if c["risk_level"] == "high")
-        medium_risk_count = sum(1 for c in chemicals if c["risk_level"] == "medium")
-        
-        if high_risk_count > 0:
-            risk_level = "High"
-            st.error("🔴 High Risk")
-        elif medium_risk_count > 1:
-            risk_level = "Medium"
-            st.warning("🟡 Medium Risk")
-        else:
-            risk_level = "Low"
-            st.success("🟢 Low Risk")
+        risk_counts = Counter(c["risk_level"] for c in chemicals)
+        high_risk_count = risk_counts["high"]
+        medium_risk_count = risk_counts["medium"]
+        
+        risk_level, risk_label, show_risk = RISK_BANDS[
+            bisect_right(RISK_THRESHOLDS, (high_risk_count, medium_risk_count))
+        ]
+        show_risk(risk_label)
         
         st.metric("Risk Level", risk_level)
     
@@ -451,13 +615,11 @@ def show_analysis_results(allergies, health_conditions):
         st.markdown("### 🥗 Nutritional Analysis")
         
         # Nutrition table
-        nutrition_df = []
-        for key, value in product_data["nutrition"].items():
-            nutrition_df.append({
-                "Nutrient": key.replace('_', ' ').title(),
-                "Amount": value,
-                "Unit": "g" if key != "calories" else "kcal"
-            })
+        nutrition = product_data["nutrition"]
+        nutrition_df = [
+            {"Nutrient": label, "Amount": nutrition[key], "Unit": unit}
+            for key, (label, unit) in NUTRIENT_LABELS.items()
+        ]
         
         st.table(nutrition_df)
         
@@ -475,8 +637,6 @@ def show_analysis_results(allergies, health_conditions):
     with tab2:
         st.markdown("### 🧪 Chemical Analysis")
         
-        chemicals = product_data["chemicals"]
-        
         if chemicals:
             for chemical in chemicals:
                 risk_class = f"risk-{chemical['risk_level']}"
@@ -487,37 +647,22 @@ def show_analysis_results(allergies, health_conditions):
                     st.markdown(f"**Description:** {chemical['description']}")
                     
                     if chemical['health_effects']:
-                        st.markdown("**Health Effects:**")
-                        for effect in chemical['health_effects']:
-                            st.markdown(f"- {effect}")
+                        st.markdown("**Health Effects:**\n\n" + bullet_list(chemical['health_effects']))
         else:
             st.success("🎉 No concerning chemicals detected!")
         
         # Chemical summary
         st.markdown("### 📊 Chemical Risk Summary")
-        risk_counts = {"High": 0, "Medium": 0, "Low": 0}
-        
-        for chemical in chemicals:
-            risk_counts[chemical['risk_level'].title()] += 1
-        
-        for risk, count in risk_counts.items():
+        for risk in RISK_ORDER:
+            count = risk_counts[risk]
             if count > 0:
-                color = {"High": "🔴", "Medium": "🟡", "Low": "🟢"}[risk]
-                st.markdown(f"{color} **{risk} Risk**: {count} chemicals")
+                st.markdown(f"{RISK_COLORS[risk]} **{risk.title()} Risk**: {count} chemicals")
     
     with tab3:
         st.markdown("### 💡 Personalized Recommendations")
         
         # Recommendation type based on health score
-        if health_score >= 7:
-            rec_type = "consume"
-            st.success("🟢 **Recommendation: SAFE TO CONSUME**")
-        elif health_score >= 4:
-            rec_type = "limit"
-            st.warning("🟡 **Recommendation: CONSUME IN MODERATION**")
-        else:
-            rec_type = "avoid"
-            st.error("🔴 **Recommendation: AVOID OR LIMIT SEVERELY**")
+        show_band(recommendation)
         
         col1, col2 = st.columns(2)
         
@@ -526,13 +671,11 @@ def show_analysis_results(allergies, health_conditions):
         
         with col1:
             st.markdown("#### ✅ Benefits")
-            for benefit in benefits:
-                st.markdown(f"- {benefit}")
+            st.markdown(bullet_list(benefits))
         
         with col2:
             st.markdown("#### ⚠️ Risks")
-            for risk in risks:
-                st.markdown(f"- {risk}")
+            st.markdown(bullet_list(risks))
         
         # Personalized warnings
         if allergies:
@@ -546,18 +689,20 @@ def show_analysis_results(allergies, health_conditions):
         # Usage tips based on product type
         st.markdown("#### 💡 Usage Tips")
         tips = generate_usage_tips(product_type, product_data)
-        for tip in tips:
-            st.markdown(f"- {tip}")
+        st.markdown(bullet_list(tips))
     
     with tab4:
         st.markdown("### 📋 Analysis Summary")
         
+        # Seed the simulated metrics from the analysis so reruns don't change them
+        now = datetime.now()
+        rng = random.Random(f"{product_type}-{product_data['seed']}")
         summary_data = {
-            "Analysis ID": f"{product_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-            "Product Type": product_type_display.get(product_type, 'Unknown'),
-            "Timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            "Processing Time": f"{random.uniform(1.5, 3.2):.1f} seconds",
-            "Confidence Score": f"{random.randint(82, 96)}%",
+            "Analysis ID": f"{product_type}_{now:%Y%m%d_%H%M%S}",
+            "Product Type": PRODUCT_TYPE_DISPLAY.get(product_type, 'Unknown'),
+            "Timestamp": f"{now:%Y-%m-%d %H:%M:%S}",
+            "Processing Time": f"{rng.uniform(1.5, 3.2):.1f} seconds",
+            "Confidence Score": f"{rng.randint(82, 96)}%",
             "Chemicals Detected": len(chemicals),
             "Overall Risk": risk_level,
             "Health Score": f"{health_score:.1f}/10",
@@ -586,142 +731,37 @@ def show_analysis_results(allergies, health_conditions):
 def generate_recommendations(product_type, product_data, health_conditions):
     """Generate dynamic recommendations based on product type"""
     
-    recommendations = {
-        "healthy_snack": {
-            "benefits": [
-                "Good source of fiber and nutrients",
-                "Lower in artificial additives",
-                "Supports sustained energy levels",
-                "Contains beneficial vitamins and minerals"
-            ],
-            "risks": [
-                "Still contains calories - watch portions",
-                "May have natural sugars",
-                "Check for allergens in nuts/seeds"
-            ]
-        },
-        "processed_snack": {
-            "benefits": [
-                "Convenient and shelf-stable",
-                "Provides quick energy",
-                "Fortified with some vitamins"
-            ],
-            "risks": [
-                "High in artificial chemicals and preservatives",
-                "Excessive sodium may affect blood pressure",
-                "Added sugars can cause blood sugar spikes",
-                "Trans fats may increase heart disease risk",
-                "Artificial colors linked to hyperactivity"
-            ]
-        },
-        "beverage": {
-            "benefits": [
-                "Provides hydration",
-                "May contain some vitamins",
-                "Quick source of energy"
-            ],
-            "risks": [
-                "High sugar content affects blood glucose",
-                "Artificial sweeteners may cause digestive issues",
-                "Phosphoric acid can affect bone health",
-                "Empty calories with little nutrition",
-                "May contribute to tooth decay"
-            ]
-        },
-        "frozen_meal": {
-            "benefits": [
-                "Convenient and time-saving",
-                "Portion-controlled serving",
-                "May contain vegetables and protein",
-                "Long shelf life"
-            ],
-            "risks": [
-                "Very high sodium content",
-                "Contains multiple preservatives",
-                "MSG may cause headaches in sensitive people",
-                "Nitrites linked to cancer risk",
-                "Highly processed ingredients"
-            ]
-        },
-        "organic_product": {
-            "benefits": [
-                "Minimal artificial additives",
-                "No synthetic pesticides",
-                "Higher nutrient density",
-                "Environmentally sustainable",
-                "Better for long-term health"
-            ],
-            "risks": [
-                "Higher cost than conventional",
-                "Shorter shelf life",
-                "Still contains natural sugars and calories"
-            ]
-        }
-    }
-    
-    default = {
-        "benefits": ["Provides energy and nutrients"],
-        "risks": ["Monitor portion sizes", "Check ingredient list"]
-    }
-    
-    return recommendations.get(product_type, default)["benefits"], recommendations.get(product_type, default)["risks"]
+    recommendation = RECOMMENDATIONS.get(product_type, DEFAULT_RECOMMENDATION)
+    return recommendation["benefits"], recommendation["risks"]
 
 def check_allergens(product_type, allergies):
     """Check for potential allergens based on product type"""
     
-    allergen_map = {
-        "healthy_snack": ["nuts", "soy", "gluten"],
-        "processed_snack": ["gluten", "soy", "milk", "eggs"],
-        "beverage": ["sulfites"],
-        "frozen_meal": ["gluten", "soy", "milk", "eggs"],
-        "organic_product": ["nuts", "soy"]
-    }
+    pattern = ALLERGEN_PATTERNS.get(product_type)
+    if pattern is None or not allergies.strip():
+        return []
     
+    product_allergens = ALLERGEN_MAP[product_type]
     warnings = []
-    product_allergens = allergen_map.get(product_type, [])
-    
-    for allergen in allergies.lower().split('\n'):
-        allergen = allergen.strip()
-        if allergen and any(allergen in pa for pa in product_allergens):
-            warnings.append(f"May contain {allergen} - check ingredient list carefully")
+    for line in allergies.splitlines():
+        entry = line.strip()
+        if not entry:
+            continue
+        
+        # Match either way round: "tree nuts" contains "nuts", and "egg"
+        # is part of "eggs"
+        match = pattern.search(entry)
+        if match:
+            warnings.append(f"May contain {match.group(0)} - check ingredient list carefully")
+        elif any(entry.lower() in allergen for allergen in product_allergens):
+            warnings.append(f"May contain {entry} - check ingredient list carefully")
     
     return warnings
 
 def generate_usage_tips(product_type, product_data):
     """Generate usage tips based on product type"""
     
-    tips_map = {
-        "healthy_snack": [
-            "Enjoy as part of a balanced diet",
-            "Pair with protein for sustained energy",
-            "Great for pre or post-workout snacking"
-        ],
-        "processed_snack": [
-            "Consume only occasionally as a treat",
-            "Drink plenty of water due to high sodium",
-            "Consider healthier alternatives for regular snacking",
-            "Monitor blood sugar if diabetic"
-        ],
-        "beverage": [
-            "Limit to special occasions",
-            "Dilute with water to reduce sugar content",
-            "Brush teeth after consumption",
-            "Choose smaller serving sizes"
-        ],
-        "frozen_meal": [
-            "Add fresh vegetables to increase nutrition",
-            "Drink extra water due to high sodium",
-            "Use as backup meal, not regular option",
-            "Check blood pressure regularly if consumed often"
-        ],
-        "organic_product": [
-            "Store properly to maintain freshness",
-            "Great choice for regular consumption",
-            "Support sustainable farming practices"
-        ]
-    }
-    
-    return tips_map.get(product_type, ["Consume in moderation", "Read labels carefully"])
+    return USAGE_TIPS.get(product_type, DEFAULT_USAGE_TIPS)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,6 +1,7 @@
 from .database import (
-    User, AnalysisSession, ProductDatabase, UserFeedback, APIUsage,
+    User, AnalysisSession, AnalysisHistory, ProductDatabase, UserFeedback, APIUsage,
     get_db, create_tables, get_user_by_id, create_user, save_analysis_session,
+    save_analysis_history, get_analysis_history,
     get_product_by_barcode, save_user_feedback, log_api_usage
 )
 from .schemas import (
@@ -9,8 +10,9 @@ from .schemas import (
 )
 
 __all__ = [
-    "User", "AnalysisSession", "ProductDatabase", "UserFeedback", "APIUsage",
+    "User", "AnalysisSession", "AnalysisHistory", "ProductDatabase", "UserFeedback", "APIUsage",
     "get_db", "create_tables", "get_user_by_id", "create_user", "save_analysis_session",
+    "save_analysis_history", "get_analysis_history",
     "get_product_by_barcode", "save_user_feedback", "log_api_usage",
     "UserProfile", "NutritionData", "AnalysisResult", "ChemicalAnalysis",
     "HealthRecommendation", "FeedbackRequest", "AnalysisRequest"
@@ -74,6 +74,20 @@ class AnalysisSession(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
+class AnalysisHistory(Base):
+    """Model for storing lightweight per-session analysis history"""
+    __tablename__ = "analysis_history"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    session_key = Column(String, index=True)
+    
+    timestamp = Column(String)
+    health_score = Column(Float)
+    novi_score = Column(Float)
+    risk_level = Column(String)
+    detected_chemicals = Column(JSON, default=list)
+
+
 class ProductDatabase(Base):
     """Model for storing known products"""
     __tablename__ = "products"
@@ -176,6 +190,33 @@ def save_analysis_session(db: Session, session_data: Dict[str, Any]) -> Analysis
     return session
 
 
+def save_analysis_history(db: Session, entries: List[Dict[str, Any]]) -> None:
+    """Save analysis history entries in a single batch"""
+    db.bulk_insert_mappings(AnalysisHistory, entries)
+    db.commit()
+
+
+def get_analysis_history(db: Session, session_key: str, limit: int = 200) -> List[Dict[str, Any]]:
+    """Get the most recent analysis history entries for a session, oldest first"""
+    rows = (
+        db.query(AnalysisHistory)
+        .filter(AnalysisHistory.session_key == session_key)
+        .order_by(AnalysisHistory.id.desc())
+        .limit(limit)
+        .all()
+    )
+    return [
+        {
+            'timestamp': row.timestamp,
+            'health_score': row.health_score,
+            'novi_score': row.novi_score,
+            'risk_level': row.risk_level,
+            'detected_chemicals': row.detected_chemicals or []
+        }
+        for row in reversed(rows)
+    ]
+
+
 def get_product_by_barcode(db: Session, barcode: str) -> Optional[ProductDatabase]:
     """Get product by barcode"""
     return db.query(ProductDatabase).filter(ProductDatabase.barcode == barcode).first()
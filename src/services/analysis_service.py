@@ -24,6 +24,44 @@ from ..utils.chemical_detector import ChemicalDetector
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+ANALYSIS_PROMPT = """
+        You are a professional nutritionist and food safety expert. Analyze this food product and provide comprehensive recommendations.
+
+        ### EXTRACTED NUTRITION LABEL TEXT:
+        {extracted_text}
+
+        ### PARSED NUTRITION DATA:
+        {nutrition_data}
+
+        ### DETECTED CHEMICALS:
+        {chemical_analysis}
+
+        ### USER HEALTH PROFILE:
+        {user_profile}
+
+        ### ANALYSIS REQUIREMENTS:
+        Provide a detailed analysis in JSON format with the following structure:
+        {{
+            "benefits": ["list of health benefits"],
+            "risks": ["list of potential health risks"],
+            "alternatives": ["list of healthier alternatives"],
+            "tips": ["list of consumption tips"],
+            "portion_size": "recommended portion size",
+            "frequency": "recommended consumption frequency"
+        }}
+
+        ### ANALYSIS GUIDELINES:
+        1. Consider the user's specific health profile (allergies, conditions, restrictions)
+        2. Evaluate both nutritional content and chemical additives
+        3. Provide evidence-based recommendations
+        4. Be specific about portion sizes and frequency
+        5. Suggest realistic alternatives
+        6. Consider the overall dietary context
+
+        ### RESPONSE FORMAT:
+        Return only valid JSON without any additional text or formatting.
+        """
+
 
 class AnalysisService:
     """Advanced food analysis service with multiple AI models and comprehensive analysis"""
@@ -32,6 +70,7 @@ class AnalysisService:
         self.settings = settings
         self.nutrition_parser = NutritionParser()
         self.chemical_detector = ChemicalDetector()
+        self._prompt_template: Optional[PromptTemplate] = None
         self._setup_ai_models()
     
     def _setup_ai_models(self):
@@ -240,45 +279,7 @@ class AnalysisService:
     ) -> str:
         """Build comprehensive analysis prompt"""
         
-        prompt_template = PromptTemplate.from_template("""
-        You are a professional nutritionist and food safety expert. Analyze this food product and provide comprehensive recommendations.
-
-        ### EXTRACTED NUTRITION LABEL TEXT:
-        {extracted_text}
-
-        ### PARSED NUTRITION DATA:
-        {nutrition_data}
-
-        ### DETECTED CHEMICALS:
-        {chemical_analysis}
-
-        ### USER HEALTH PROFILE:
-        {user_profile}
-
-        ### ANALYSIS REQUIREMENTS:
-        Provide a detailed analysis in JSON format with the following structure:
-        {{
-            "benefits": ["list of health benefits"],
-            "risks": ["list of potential health risks"],
-            "alternatives": ["list of healthier alternatives"],
-            "tips": ["list of consumption tips"],
-            "portion_size": "recommended portion size",
-            "frequency": "recommended consumption frequency"
-        }}
-
-        ### ANALYSIS GUIDELINES:
-        1. Consider the user's specific health profile (allergies, conditions, restrictions)
-        2. Evaluate both nutritional content and chemical additives
-        3. Provide evidence-based recommendations
-        4. Be specific about portion sizes and frequency
-        5. Suggest realistic alternatives
-        6. Consider the overall dietary context
-
-        ### RESPONSE FORMAT:
-        Return only valid JSON without any additional text or formatting.
-        """)
-        
-        return prompt_template.format(
+        return self._get_prompt_template().format(
             extracted_text=extracted_text[:1000],  # Limit text length
             nutrition_data=nutrition_data.dict() if nutrition_data else "Not available",
             chemical_analysis={
@@ -289,6 +290,12 @@ class AnalysisService:
             user_profile=user_profile.dict() if user_profile else "Not provided"
         )
     
+    def _get_prompt_template(self) -> PromptTemplate:
+        """Get the analysis prompt template, parsing it on first use"""
+        if self._prompt_template is None:
+            self._prompt_template = PromptTemplate.from_template(ANALYSIS_PROMPT)
+        return self._prompt_template
+    
     async def _query_groq_llm(self, prompt: str) -> str:
         """Query Groq LLM"""
         try:
@@ -0,0 +1,59 @@
+"""
+Database helper tests
+"""
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.models.database import Base, save_analysis_history, get_analysis_history
+
+
+def make_entry(session_key, index):
+    """Build one analysis history entry"""
+    return {
+        'session_key': session_key,
+        'timestamp': f"2024-01-01 00:00:{index:02d}",
+        'health_score': float(index),
+        'novi_score': float(index * 10),
+        'risk_level': 'low',
+        'detected_chemicals': [f"chemical_{index}"]
+    }
+
+
+class TestAnalysisHistory:
+    """Test analysis history persistence"""
+    
+    def setup_method(self):
+        """Setup an in-memory database"""
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        
+        save_analysis_history(self.db, [make_entry('session_a', i) for i in range(5)])
+        save_analysis_history(self.db, [make_entry('session_b', i) for i in range(3)])
+    
+    def teardown_method(self):
+        """Close the database"""
+        self.db.close()
+        self.engine.dispose()
+    
+    def test_only_session_rows_returned(self):
+        """Test history is scoped to the requested session"""
+        history = get_analysis_history(self.db, 'session_b')
+        
+        assert len(history) == 3
+        assert [entry['health_score'] for entry in history] == [0.0, 1.0, 2.0]
+        assert 'session_key' not in history[0]
+    
+    def test_limit_returns_newest_oldest_first(self):
+        """Test the newest rows are returned in chronological order"""
+        history = get_analysis_history(self.db, 'session_a', limit=2)
+        
+        assert [entry['timestamp'] for entry in history] == [
+            "2024-01-01 00:00:03",
+            "2024-01-01 00:00:04"
+        ]
+        assert history[-1]['detected_chemicals'] == ["chemical_4"]
+    
+    def test_unknown_session_returns_empty(self):
+        """Test an unknown session key has no history"""
+        assert get_analysis_history(self.db, 'missing') == []
\ No newline at end of file
@@ -116,6 +116,13 @@ class TestAnalysisService:
         assert result.health_recommendation is not None
         assert result.processing_time > 0
     
+    def test_prompt_template_reused(self):
+        """Test prompt template is parsed once and reused"""
+        template = self.analysis_service._get_prompt_template()
+        
+        assert template is not None
+        assert self.analysis_service._get_prompt_template() is template
+    
     def test_calculate_nutrition_score(self):
         """Test nutrition score calculation"""
         # Good nutrition